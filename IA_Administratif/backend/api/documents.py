@@ -216,7 +216,7 @@ async def process_uploaded_document(file_path: str, document_id: int, user_id: i
         
         # 3. Traitement OCR avec le moteur hybride
         from ocr.hybrid_ocr import HybridOCREngine, OCRStrategy
-        from ocr.entity_extractor import EntityExtractor
+        from ocr.entity_extractor import get_entity_extractor
         
         try:
             # OCR hybride (TrOCR + Tesseract fallback)
@@ -227,7 +227,7 @@ async def process_uploaded_document(file_path: str, document_id: int, user_id: i
             )
             
             # Extraction d'entités
-            entity_extractor = EntityExtractor()
+            entity_extractor = get_entity_extractor()
             entities = []
             if hasattr(ocr_result, 'text') and ocr_result.text:
                 try:
@@ -617,7 +617,7 @@ async def upload_and_process_document(
             # 4. OCR avec Tesseract (fallback fiable)
             logger.info("🔍 Démarrage OCR Tesseract...")
             from ocr.tesseract_ocr import TesseractOCR
-            from ocr.entity_extractor import EntityExtractor
+            from ocr.entity_extractor import get_entity_extractor
             
             ocr_engine = TesseractOCR()
             ocr_result = ocr_engine.extract_text(processing_path)
@@ -629,7 +629,7 @@ async def upload_and_process_document(
             logger.info(f"✅ OCR terminé: {word_count} mots, confiance: {ocr_confidence:.2f}")
             
             # 5. Extraction d'entités
-            entity_extractor = EntityExtractor()
+            entity_extractor = get_entity_extractor()
             entities_data = []
             
             if ocr_text:
@@ -173,8 +173,8 @@ async def pipeline_health_check():
     
     # 4. Test Entity Extraction
     try:
-        from ocr.entity_extractor import EntityExtractor
-        extractor = EntityExtractor()
+        from ocr.entity_extractor import get_entity_extractor
+        extractor = get_entity_extractor()
         pipeline_status["components"]["entity_extraction"] = {
             "status": "ready",
             "nlp_model": "spacy_enabled"
@@ -26,9 +26,9 @@ from ocr.tesseract_ocr import TesseractOCR, OCRResult
 # Imports avancés commentés temporairement à cause de dépendances manquantes dans Docker
 from ocr.trocr_ocr import TrOCREngine, TrOCRConfig
 from ocr.hybrid_ocr import HybridOCREngine, HybridOCRConfig, OCRStrategy
-from ocr.layoutlm_ocr import LayoutLMEngine, LayoutLMConfig
+from ocr.layoutlm_ocr import get_layoutlm_engine
 from ocr.table_detector import TableDetector, TableDetectorConfig, TableDetectionMethod
-from ocr.entity_extractor import EntityExtractor, extract_document_metadata
+from ocr.entity_extractor import get_entity_extractor, extract_document_metadata
 from ocr.apple_silicon_optimizer import AppleSiliconOCROptimizer
 from ocr.ocr_cache import OCRCacheManager
 
@@ -40,9 +40,7 @@ router = APIRouter(prefix="/api/v1/ocr", tags=["OCR"])
 # Initialisation des modules OCR (lazy loading)
 _hybrid_ocr_engine = None
 _trocr_engine = None
-_layoutlm_engine = None
 _table_detector = None
-_entity_extractor = None
 _apple_optimizer = None
 _cache_manager = None
 
@@ -207,10 +205,16 @@ async def preprocess_image(
             
             logger.info(f"Image chargée: {file.filename}, taille: {original_size}")
             
-            # Configuration du prétraitement selon les options
-            processed_image = original_image.copy()
+            # Configuration du prétraitement selon les options (les étapes
+            # produisent de nouveaux tableaux, l'original n'est pas modifié)
+            processed_image = original_image
             
-            if request.apply_rotation_correction:
+            if request.apply_rotation_correction and request.crop_borders:
+                # Rotation et découpage en une seule interpolation, avant le
+                # débruitage qui ne porte alors que sur la zone conservée
+                processed_image = preprocessor.correct_rotation_and_crop(processed_image)
+                logger.debug("Correction de rotation et suppression des bordures appliquées")
+            elif request.apply_rotation_correction:
                 processed_image = preprocessor.correct_rotation(processed_image)
                 logger.debug("Correction de rotation appliquée")
             
@@ -218,7 +222,7 @@ async def preprocess_image(
                 processed_image = preprocessor.denoise_image(processed_image)
                 logger.debug("Débruitage appliqué")
             
-            if request.crop_borders:
+            if request.crop_borders and not request.apply_rotation_correction:
                 processed_image = preprocessor.detect_and_crop_borders(processed_image)
                 logger.debug("Bordures supprimées")
             
@@ -764,9 +768,7 @@ async def advanced_ocr_processing(
             # Analyse de structure si demandée
             if request.analyze_structure:
                 try:
-                    layoutlm_config = LayoutLMConfig()
-                    layoutlm_engine = LayoutLMEngine(layoutlm_config)
-                    _, regions = layoutlm_engine.extract_structured_text(temp_input_path, preprocess=request.preprocess)
+                    _, regions = get_layoutlm_engine().extract_structured_text(temp_input_path, preprocess=request.preprocess)
                     
                     for region in regions:
                         structure_regions.append({
@@ -784,7 +786,7 @@ async def advanced_ocr_processing(
             # Extraction d'entités avancée si demandée
             if request.extract_entities:
                 try:
-                    entity_extractor = EntityExtractor()
+                    entity_extractor = get_entity_extractor()
                     entity_result = entity_extractor.extract_entities(ocr_result.text)
                     
                     # Enrichir les entités détectées
@@ -875,10 +877,7 @@ async def analyze_document_structure(
             temp_input_path = tmp_file.name
         
         try:
-            layoutlm_config = LayoutLMConfig()
-            layoutlm_engine = LayoutLMEngine(layoutlm_config)
-            
-            ocr_result, regions = layoutlm_engine.extract_structured_text(temp_input_path)
+            ocr_result, regions = get_layoutlm_engine().extract_structured_text(temp_input_path)
             
             response_data = {
                 "success": True,
@@ -1010,7 +1009,7 @@ async def extract_document_entities(
             ocr_result = tesseract_engine.extract_text(temp_input_path)
             
             # Extraction d'entités
-            entity_extractor = EntityExtractor()
+            entity_extractor = get_entity_extractor()
             entity_result = entity_extractor.extract_entities(
                 ocr_result.text, 
                 entity_types=request.entity_types
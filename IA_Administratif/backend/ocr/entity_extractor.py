@@ -5,6 +5,9 @@ Extraction avancée de dates, montants, adresses, numéros, etc.
 
 import logging
 import re
+import sys
+import threading
+from collections import Counter
 from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime, date
@@ -23,8 +26,90 @@ except ImportError:
     SPACY_AVAILABLE = False
     logger.warning("spaCy n'est pas disponible - utilisation des regex seulement")
 
+# Import conditionnel de ciso8601 (parsing ISO en C)
+try:
+    import ciso8601
+    CISO8601_AVAILABLE = True
+except ImportError:
+    CISO8601_AVAILABLE = False
+
+# Import conditionnel de Hyperscan (pré-filtrage des patterns fréquents en C)
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Import conditionnel de pyahocorasick (recherche multi-mots-clés en un passage)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Types d'entités les plus coûteux sur les factures, pré-filtrés par Hyperscan
+HOT_ENTITY_TYPES = ('phones', 'emails', 'iban', 'siret', 'amounts')
+
+# Types d'entités dont tous les patterns exigent au moins un chiffre
+DIGIT_ENTITY_TYPES = ('dates', 'amounts', 'phones', 'siret', 'iban', 'percentages', 'addresses')
+_DIGIT_RE = re.compile(r'\d')
+
+# Vocabulaires fermés présents comme alternatives obligatoires dans les patterns:
+# un pattern contenant "(?:mot1|mot2|...)" est ignoré si aucun de ces mots n'est dans le texte
+KEYWORD_FAMILIES: Dict[str, Tuple[str, ...]] = {
+    'street_types': ('rue', 'avenue', 'boulevard', 'place', 'allée', 'impasse', 'chemin', 'route'),
+    'french_months': ('janvier', 'février', 'mars', 'avril', 'mai', 'juin', 'juillet', 'août',
+                      'septembre', 'octobre', 'novembre', 'décembre'),
+    'english_months': ('january', 'february', 'march', 'april', 'may', 'june', 'july', 'august',
+                       'september', 'october', 'november', 'december'),
+    'french_days': ('lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi', 'dimanche'),
+    'company_suffixes_intl': ('ltd', 'inc', 'corp', 'llc', 'gmbh'),
+    'invoice_keywords': ('facture', 'invoice', 'bill'),
+    'amount_keywords': ('total', 'montant', 'prix', 'coût', 'facture', 'facture'),
+}
+
+# Caractères dont la minuscule ne suffit pas à reproduire re.IGNORECASE (ſ, ı, µ, ς...)
+_CASE_FOLD_AMBIGUOUS = frozenset(
+    char for char in map(chr, range(0x10000))
+    if not 0xD800 <= ord(char) < 0xE000
+    and len(char.upper()) == 1 and char.upper().lower() != char.lower()
+)
+
+# Nettoyage des montants: symboles monétaires et tous les espaces (équivalent de [€$£\s])
+_AMOUNT_STRIP = str.maketrans('', '', '€$£' + ''.join(
+    chr(code) for code in range(0x3001) if chr(code).isspace()
+))
+_EURO_RE = re.compile(r'euros?', re.IGNORECASE)
+
+# Composants spaCy inutiles pour la NER (non chargés)
+SPACY_UNUSED_COMPONENTS = ('parser', 'tagger', 'morphologizer', 'lemmatizer', 'attribute_ruler', 'senter')
+
+# Confiance des entités spaCy quand le pipeline n'émet pas de score
+SPACY_DEFAULT_CONFIDENCE = 0.8
+
+# Profils de documents (catégories du classificateur) -> types d'entités utiles
+DOCUMENT_PROFILES: Dict[str, Tuple[str, ...]] = {
+    'factures': ('dates', 'amounts', 'companies', 'siret', 'iban', 'invoice_numbers', 'percentages'),
+    'rib': ('iban', 'companies', 'addresses'),
+    'contrats': ('dates', 'amounts', 'companies', 'addresses', 'siret'),
+    'courriers': ('dates', 'addresses', 'companies', 'emails', 'phones'),
+    'impots': ('dates', 'amounts', 'percentages', 'addresses'),
+}
+
+# Formes de dates reconnues -> formats strptime à essayer (dans l'ordre)
+_DATE_SHAPES = [
+    (re.compile(r'\d{4}-\d{1,2}-\d{1,2}'), ('%Y-%m-%d',)),
+    (re.compile(r'\d{1,2}/\d{1,2}/\d{4}'), ('%d/%m/%Y', '%m/%d/%Y')),
+    (re.compile(r'\d{1,2}-\d{1,2}-\d{4}'), ('%d-%m-%Y', '%m-%d-%Y')),
+    (re.compile(r'\d{1,2}\.\d{1,2}\.\d{4}'), ('%d.%m.%Y',)),
+    (re.compile(r'\d{1,2}/\d{1,2}/\d{2}'), ('%d/%m/%y',)),
+    (re.compile(r'\d{1,2}-\d{1,2}-\d{2}'), ('%d-%m-%y',)),
+    (re.compile(r'\d{1,2}\.\d{1,2}\.\d{2}'), ('%d.%m.%y',)),
+    (re.compile(r'\d{1,2}\s+[A-Za-z]+\s+\d{4}'), ('%d %B %Y', '%d %b %Y')),
+]
 
-@dataclass
+
+@dataclass(slots=True)
 class ExtractedEntity:
     """Entité extraite avec métadonnées"""
     entity_type: str
@@ -37,7 +122,7 @@ class ExtractedEntity:
     pattern_used: Optional[str] = None
 
 
-@dataclass 
+@dataclass(slots=True)
 class EntityExtractionResult:
     """Résultat d'extraction d'entités"""
     text: str
@@ -52,14 +137,16 @@ class EntityExtractor:
     Extracteur d'entités spécialisé pour documents d'affaires
     """
     
-    def __init__(self, language: str = "fr_core_news_sm"):
+    def __init__(self, language: str = "fr_core_news_sm", min_ner_score: float = 0.5):
         """
         Initialise l'extracteur d'entités
         
         Args:
             language: Modèle spaCy à utiliser (fr_core_news_sm pour le français)
+            min_ner_score: Score minimal des entités spaCy conservées
         """
         self.language = language
+        self.min_ner_score = min_ner_score
         self.nlp = None
         
         # Patterns regex pour différents types d'entités
@@ -126,12 +213,44 @@ class EntityExtractor:
             ]
         }
         
+        # Patterns précompilés: (source, version insensible à la casse, version minuscule)
+        self._compiled_patterns = {
+            entity_type: [self._compile_pattern(pattern) for pattern in patterns]
+            for entity_type, patterns in self.patterns.items()
+        }
+        
+        # Pré-filtre Hyperscan pour les patterns fréquents (si disponible)
+        self._hot_patterns: List[str] = []
+        self._hot_db = None
+        self._hot_scratch = threading.local()
+        self._initialize_hot_prefilter()
+        
+        # Familles de mots-clés requises par pattern (vocabulaires fermés)
+        self._pattern_families = {}
+        for patterns in self.patterns.values():
+            for pattern in patterns:
+                pattern_lower = pattern.lower()
+                families = tuple(
+                    family for family, keywords in KEYWORD_FAMILIES.items()
+                    if '(?:' + '|'.join(keywords) + ')' in pattern_lower
+                )
+                if families:
+                    self._pattern_families[pattern] = families
+        self._keyword_automaton = None
+        self._initialize_keyword_automaton()
+        
+        # Types d'entités internés (comparaisons par identité dans les dicts)
+        self._interned_types = {t: sys.intern(t) for t in self.patterns}
+        
         # Mois en français pour la normalisation des dates
         self.french_months = {
             'janvier': 1, 'février': 2, 'mars': 3, 'avril': 4,
             'mai': 5, 'juin': 6, 'juillet': 7, 'août': 8,
             'septembre': 9, 'octobre': 10, 'novembre': 11, 'décembre': 12
         }
+        self._french_months_re = re.compile(
+            r'\b(' + '|'.join(self.french_months) + r')\b', re.IGNORECASE
+        )
         
         # Initialiser spaCy si disponible
         self._initialize_nlp()
@@ -141,14 +260,137 @@ class EntityExtractor:
         try:
             import spacy
             
-            # Chargement direct du modèle spaCy (compatible v3.x)
-            self.nlp = spacy.load(self.language)
-            logger.info(f"Modèle spaCy chargé: {self.language}")
+            # Chargement du modèle spaCy (compatible v3.x) limité à tok2vec + ner
+            self.nlp = spacy.load(self.language, exclude=list(SPACY_UNUSED_COMPONENTS))
+            logger.info(f"Modèle spaCy chargé: {self.language} ({', '.join(self.nlp.pipe_names)})")
         except (ImportError, OSError) as e:
             logger.warning(f"spaCy non disponible ou modèle non trouvé: {e}")
             logger.info("Utilisation des regex uniquement")
             self.nlp = None
     
+    def _initialize_hot_prefilter(self):
+        """
+        Compile les patterns fréquents dans une base Hyperscan unique
+        
+        La base sert uniquement de pré-filtre (HS_FLAG_PREFILTER): elle indique
+        en un seul passage C quels patterns peuvent correspondre, les
+        correspondances exactes restant calculées par le module re.
+        """
+        if not HYPERSCAN_AVAILABLE:
+            return
+        
+        hot_patterns = [
+            pattern
+            for entity_type in HOT_ENTITY_TYPES
+            for pattern in self.patterns.get(entity_type, [])
+        ]
+        flags = (
+            hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP |
+            hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_PREFILTER
+        )
+        
+        try:
+            db = hyperscan.Database()
+            db.compile(
+                expressions=[pattern.encode('utf-8') for pattern in hot_patterns],
+                ids=list(range(len(hot_patterns))),
+                elements=len(hot_patterns),
+                flags=[flags] * len(hot_patterns)
+            )
+        except Exception as e:
+            logger.warning(f"Pré-filtre Hyperscan désactivé: {e}")
+            return
+        
+        self._hot_patterns = hot_patterns
+        self._hot_db = db
+        logger.info(f"Pré-filtre Hyperscan actif sur {len(hot_patterns)} patterns")
+    
+    def _initialize_keyword_automaton(self):
+        """Construit un automate Aho-Corasick sur tous les mots-clés (si disponible)"""
+        if not AHOCORASICK_AVAILABLE:
+            return
+        
+        automaton = ahocorasick.Automaton()
+        for keywords in KEYWORD_FAMILIES.values():
+            for keyword in keywords:
+                automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        self._keyword_automaton = automaton
+    
+    def _prefilter_keyword_patterns(self, text_lower: Optional[str]) -> set:
+        """
+        Retourne les patterns à vocabulaire fermé dont aucun mot-clé n'apparaît
+        
+        Un seul passage Aho-Corasick (ou des recherches de sous-chaînes à défaut)
+        sur le texte en minuscules remplace le parcours des alternatives par le
+        moteur regex. Sans texte minuscule fiable, aucun pattern n'est ignoré.
+        """
+        if text_lower is None or not self._pattern_families:
+            return set()
+        
+        if self._keyword_automaton is not None:
+            found_keywords = {keyword for _, keyword in self._keyword_automaton.iter(text_lower)}
+        else:
+            found_keywords = {
+                keyword
+                for keywords in KEYWORD_FAMILIES.values()
+                for keyword in keywords
+                if keyword in text_lower
+            }
+        
+        present_families = {
+            family for family, keywords in KEYWORD_FAMILIES.items()
+            if not found_keywords.isdisjoint(keywords)
+        }
+        
+        return {
+            pattern for pattern, families in self._pattern_families.items()
+            if not present_families.issuperset(families)
+        }
+    
+    def _prefilter_hot_patterns(self, text: str) -> Optional[set]:
+        """
+        Retourne les patterns fréquents susceptibles de correspondre au texte
+        
+        Returns:
+            Ensemble des patterns candidats, ou None si le pré-filtre est inactif
+        """
+        if self._hot_db is None:
+            return None
+        
+        # Un scratch Hyperscan par thread (non partageable entre scans concurrents)
+        scratch = getattr(self._hot_scratch, 'scratch', None)
+        if scratch is None:
+            scratch = self._hot_scratch.scratch = hyperscan.Scratch(self._hot_db)
+        
+        candidates = set()
+        
+        def on_match(pattern_id, start, end, flags, context):
+            candidates.add(self._hot_patterns[pattern_id])
+        
+        try:
+            self._hot_db.scan(text.encode('utf-8'), match_event_handler=on_match, scratch=scratch)
+        except Exception as e:
+            logger.debug(f"Erreur pré-filtre Hyperscan: {e}")
+            return None
+        
+        return candidates
+    
+    @staticmethod
+    def _compile_pattern(pattern: str) -> Tuple[str, "re.Pattern", Optional["re.Pattern"]]:
+        """
+        Compile un pattern en deux variantes: insensible à la casse (texte original)
+        et minuscule sans IGNORECASE (texte déjà passé en minuscules)
+        """
+        compiled = re.compile(pattern, re.IGNORECASE)
+        
+        # Les classes majuscules (\D, \S, \W...) ne supportent pas la mise en minuscules
+        compiled_lower = None
+        if not re.search(r'\\[A-Z]', pattern):
+            compiled_lower = re.compile(pattern.lower())
+        
+        return pattern, compiled, compiled_lower
+    
     def extract_entities(self, text: str, entity_types: Optional[List[str]] = None) -> EntityExtractionResult:
         """
         Extrait les entités du texte
@@ -170,10 +412,27 @@ class EntityExtractor:
         
         all_entities = []
         
+        # Texte en minuscules calculé une fois (les positions doivent rester alignées
+        # et la mise en minuscules doit reproduire re.IGNORECASE)
+        text_lower = text.lower()
+        if len(text_lower) != len(text) or not _CASE_FOLD_AMBIGUOUS.isdisjoint(text):
+            text_lower = None
+        
+        # Sondage rapide du contenu: familles de patterns impossibles à satisfaire
+        content_checks = self._sniff_content(text, text_lower)
+        
+        # Patterns ignorés: vocabulaire fermé absent, puis pré-filtre Hyperscan
+        skip_patterns = self._prefilter_keyword_patterns(text_lower)
+        hot_candidates = self._prefilter_hot_patterns(text)
+        if hot_candidates is not None:
+            skip_patterns.update(
+                pattern for pattern in self._hot_patterns if pattern not in hot_candidates
+            )
+        
         # Extraction par patterns regex
         for entity_type in entity_types:
-            if entity_type in self.patterns:
-                entities = self._extract_with_regex(text, entity_type)
+            if entity_type in self.patterns and content_checks.get(entity_type, True):
+                entities = self._extract_with_regex(text, entity_type, text_lower, skip_patterns)
                 all_entities.extend(entities)
         
         # Extraction avec spaCy si disponible
@@ -188,9 +447,7 @@ class EntityExtractor:
         unique_entities = self._remove_overlapping_entities(all_entities)
         
         # Comptage par type
-        entity_counts = {}
-        for entity in unique_entities:
-            entity_counts[entity.entity_type] = entity_counts.get(entity.entity_type, 0) + 1
+        entity_counts = dict(Counter(entity.entity_type for entity in unique_entities))
         
         processing_time = time.time() - start_time
         
@@ -204,39 +461,71 @@ class EntityExtractor:
             extraction_method="hybrid" if self.nlp else "regex"
         )
     
-    def _extract_with_regex(self, text: str, entity_type: str) -> List[ExtractedEntity]:
-        """Extrait les entités avec les patterns regex"""
+    def _sniff_content(self, text: str, text_lower: Optional[str] = None) -> Dict[str, bool]:
+        """
+        Indique pour chaque type d'entité si le texte peut contenir une correspondance
+        
+        Seules des conditions nécessaires sont testées (présence d'un chiffre,
+        de '@', de '%'...), via des recherches de sous-chaînes en C.
+        Les types absents du résultat sont toujours analysés.
+        """
+        has_digit = _DIGIT_RE.search(text) is not None
+        searchable = text_lower if text_lower is not None else text.lower()
+        
+        content_checks = {entity_type: has_digit for entity_type in DIGIT_ENTITY_TYPES}
+        content_checks['emails'] = '@' in text
+        content_checks['percentages'] = has_digit and '%' in text
+        content_checks['urls'] = 'http' in searchable or 'www.' in searchable
+        
+        return content_checks
+    
+    def _extract_with_regex(self, text: str, entity_type: str,
+                            text_lower: Optional[str] = None,
+                            skip_patterns: Optional[set] = None) -> List[ExtractedEntity]:
+        """
+        Extrait les entités avec les patterns regex
+        
+        Si text_lower est fourni, les patterns minuscules sont appliqués dessus
+        (pas de repliement de casse à chaque caractère) et les valeurs sont lues
+        dans le texte original aux mêmes positions.
+        
+        Les patterns de skip_patterns (écartés par les pré-filtres) sont ignorés.
+        """
         entities = []
-        patterns = self.patterns.get(entity_type, [])
+        append = entities.append
+        compiled_patterns = self._compiled_patterns.get(entity_type, [])
+        entity_type = self._interned_types.get(entity_type, entity_type)
+        
+        # Méthodes résolues une fois (boucle chaude sur chaque correspondance)
+        normalize_value = self._normalize_value
+        calculate_confidence = self._calculate_confidence
+        extract_context = self._extract_context
         
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
+        skip_patterns = skip_patterns or ()
+        
+        for pattern, compiled, compiled_lower in compiled_patterns:
+            if pattern in skip_patterns:
+                continue
+            
+            if text_lower is not None and compiled_lower is not None:
+                matches = compiled_lower.finditer(text_lower)
+            else:
+                matches = compiled.finditer(text)
             
             for match in matches:
-                value = match.group().strip()
                 start, end = match.span()
+                value = text[start:end].strip()
                 
-                # Normaliser la valeur selon le type
-                normalized_value = self._normalize_value(value, entity_type)
-                
-                # Calculer un score de confiance
-                confidence = self._calculate_confidence(value, entity_type, pattern)
-                
-                # Extraire le contexte
-                context = self._extract_context(text, start, end)
-                
-                entity = ExtractedEntity(
+                append(ExtractedEntity(
                     entity_type=entity_type,
                     value=value,
-                    confidence=confidence,
+                    confidence=calculate_confidence(value, entity_type, pattern),
                     start_position=start,
                     end_position=end,
-                    normalized_value=normalized_value,
-                    context=context,
+                    normalized_value=normalize_value(value, entity_type),
+                    context=extract_context(text, start, end),
                     pattern_used=pattern
-                )
-                
-                entities.append(entity)
+                ))
         
         return entities
     
@@ -260,28 +549,66 @@ class EntityExtractor:
             'PERCENT': 'percentages'
         }
         
+        # Scores émis par les composants du pipeline (si disponibles)
+        ner_scores = self._get_ner_scores(doc)
+        
         for ent in doc.ents:
             entity_type = spacy_mapping.get(ent.label_, 'other')
             
-            if entity_type in entity_types or 'other' in entity_types:
-                # Normaliser la valeur
-                normalized_value = self._normalize_value(ent.text, entity_type)
-                
-                entity = ExtractedEntity(
-                    entity_type=entity_type,
-                    value=ent.text,
-                    confidence=0.8,  # spaCy est généralement fiable
-                    start_position=ent.start_char,
-                    end_position=ent.end_char,
-                    normalized_value=normalized_value,
-                    context=self._extract_context(text, ent.start_char, ent.end_char),
-                    pattern_used="spacy_" + ent.label_
-                )
-                
-                entities.append(entity)
+            if entity_type not in entity_types and 'other' not in entity_types:
+                continue
+            
+            # Filtrer les prédictions peu sûres avant normalisation et dédoublonnage
+            confidence = ner_scores.get(
+                (ent.start_char, ent.end_char, ent.label_), SPACY_DEFAULT_CONFIDENCE
+            )
+            if confidence < self.min_ner_score:
+                continue
+            
+            # Normaliser la valeur
+            normalized_value = self._normalize_value(ent.text, entity_type)
+            
+            entity = ExtractedEntity(
+                entity_type=entity_type,
+                value=ent.text,
+                confidence=confidence,
+                start_position=ent.start_char,
+                end_position=ent.end_char,
+                normalized_value=normalized_value,
+                context=self._extract_context(text, ent.start_char, ent.end_char),
+                pattern_used=sys.intern("spacy_" + ent.label_)
+            )
+            
+            entities.append(entity)
         
         return entities
     
+    def _get_ner_scores(self, doc) -> Dict[Tuple[int, int, str], float]:
+        """
+        Récupère les scores des entités émis par le pipeline spaCy
+        
+        Sources supportées: groupes de spans avec attrs["scores"] (spancat)
+        et extension personnalisée Span._.score. Le composant ner standard
+        n'émet pas de score: le dictionnaire retourné est alors vide.
+        """
+        scores = {}
+        
+        for group in doc.spans.values():
+            group_scores = group.attrs.get("scores")
+            if group_scores is None:
+                continue
+            for span, score in zip(group, group_scores):
+                key = (span.start_char, span.end_char, span.label_)
+                scores[key] = max(float(score), scores.get(key, 0.0))
+        
+        if doc.ents and doc.ents[0].has_extension("score"):
+            for ent in doc.ents:
+                score = ent._.score
+                if score is not None:
+                    scores[(ent.start_char, ent.end_char, ent.label_)] = float(score)
+        
+        return scores
+    
     def _normalize_value(self, value: str, entity_type: str) -> Any:
         """Normalise une valeur selon son type"""
         try:
@@ -307,37 +634,38 @@ class EntityExtractor:
         """Normalise une date vers un objet date Python"""
         date_str = date_str.strip()
         
-        # Formats à essayer
-        formats = [
-            '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y',
-            '%d/%m/%y', '%d-%m-%y', '%d.%m.%y',
-            '%Y-%m-%d',
-            '%m/%d/%Y', '%m-%d-%Y',
-            '%d %B %Y', '%d %b %Y'
-        ]
-        
-        # Remplacer les mois français
-        for french_month, month_num in self.french_months.items():
-            date_str = re.sub(
-                r'\b' + french_month + r'\b', 
-                str(month_num), 
-                date_str, 
-                flags=re.IGNORECASE
-            )
+        # Remplacer les mois français (une seule passe)
+        date_str = self._french_months_re.sub(
+            lambda m: str(self.french_months[m.group(1).lower()]),
+            date_str
+        )
         
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt).date()
-            except ValueError:
+        # Identifier la forme de la date puis parser avec le(s) format(s) correspondant(s)
+        for shape, formats in _DATE_SHAPES:
+            if not shape.fullmatch(date_str):
                 continue
+            
+            if CISO8601_AVAILABLE and formats[0] == '%Y-%m-%d' and len(date_str) == 10:
+                try:
+                    return ciso8601.parse_datetime(date_str).date()
+                except ValueError:
+                    return None
+            
+            for fmt in formats:
+                try:
+                    return datetime.strptime(date_str, fmt).date()
+                except ValueError:
+                    continue
+            return None
         
         return None
     
     def _normalize_amount(self, amount_str: str) -> Optional[Decimal]:
         """Normalise un montant vers un Decimal"""
-        # Nettoyer la chaîne
-        amount_str = re.sub(r'[€$£\s]', '', amount_str)
-        amount_str = re.sub(r'euros?', '', amount_str, flags=re.IGNORECASE)
+        # Nettoyer la chaîne (table de traduction, regex seulement si "euro" présent)
+        amount_str = amount_str.translate(_AMOUNT_STRIP)
+        if 'euro' in amount_str.lower():
+            amount_str = _EURO_RE.sub('', amount_str)
         
         # Gérer les formats français (virgule décimale)
         if ',' in amount_str and '.' in amount_str:
@@ -349,9 +677,6 @@ class EntityExtractor:
             if len(parts[1]) <= 2:  # Partie décimale
                 amount_str = amount_str.replace(',', '.')
         
-        # Supprimer les espaces restants
-        amount_str = amount_str.replace(' ', '')
-        
         try:
             return Decimal(amount_str)
         except (InvalidOperation, ValueError):
@@ -498,30 +823,28 @@ class EntityExtractor:
             'other': '#e0e0e0'
         }
         
-        highlighted_text = result.text
-        offset = 0
+        # Construction en une seule passe (évite les copies quadratiques)
+        text = result.text
+        parts = []
+        cursor = 0
         
         for entity in sorted(result.entities, key=lambda x: x.start_position):
             color = colors.get(entity.entity_type, colors['other'])
             
-            start = entity.start_position + offset
-            end = entity.end_position + offset
-            
-            # Créer le marquage HTML
-            highlight_start = f'<mark style="background-color:{color}" title="{entity.entity_type} ({entity.confidence:.2f})">'
-            highlight_end = '</mark>'
+            # Ignorer les entités chevauchant une zone déjà marquée
+            if entity.start_position < cursor:
+                continue
             
-            highlighted_text = (
-                highlighted_text[:start] + 
-                highlight_start + 
-                highlighted_text[start:end] + 
-                highlight_end + 
-                highlighted_text[end:]
-            )
+            parts.append(text[cursor:entity.start_position])
+            parts.append(f'<mark style="background-color:{color}" title="{entity.entity_type} ({entity.confidence:.2f})">')
+            parts.append(text[entity.start_position:entity.end_position])
+            parts.append('</mark>')
             
-            offset += len(highlight_start) + len(highlight_end)
+            cursor = entity.end_position
+        
+        parts.append(text[cursor:])
         
-        return highlighted_text
+        return "".join(parts)
     
     def export_entities_to_json(self, result: EntityExtractionResult, output_file: str):
         """Exporte les entités vers un fichier JSON"""
@@ -558,6 +881,26 @@ class EntityExtractor:
         logger.info(f"Entités exportées vers: {output_file}")
 
 
+# Extracteur partagé: patterns et base Hyperscan compilés une seule fois par
+# processus (scratch Hyperscan par thread, utilisable depuis plusieurs threads)
+_shared_extractor: Optional[EntityExtractor] = None
+_shared_extractor_lock = threading.Lock()
+
+
+def get_entity_extractor() -> EntityExtractor:
+    """
+    Retourne l'extracteur d'entités partagé (créé au premier appel)
+    
+    Returns:
+        Extracteur d'entités initialisé
+    """
+    global _shared_extractor
+    with _shared_extractor_lock:
+        if _shared_extractor is None:
+            _shared_extractor = EntityExtractor()
+    return _shared_extractor
+
+
 def extract_entities_simple(text: str, entity_types: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
     """
     Fonction simple pour extraire des entités
@@ -569,7 +912,7 @@ def extract_entities_simple(text: str, entity_types: Optional[List[str]] = None)
     Returns:
         Dictionnaire des entités par type
     """
-    extractor = EntityExtractor()
+    extractor = get_entity_extractor()
     result = extractor.extract_entities(text, entity_types)
     
     entities_dict = {}
@@ -587,18 +930,26 @@ def extract_entities_simple(text: str, entity_types: Optional[List[str]] = None)
     return entities_dict
 
 
-def extract_document_metadata(text: str) -> Dict[str, Any]:
+def extract_document_metadata(text: str, profile: Optional[str] = None) -> Dict[str, Any]:
     """
     Extrait les métadonnées principales d'un document
     
     Args:
         text: Texte du document
+        profile: Catégorie du document (voir DOCUMENT_PROFILES) pour ne lancer
+            que les patterns pertinents (None = tous)
         
     Returns:
         Métadonnées structurées du document
     """
-    extractor = EntityExtractor()
-    result = extractor.extract_entities(text)
+    entity_types = None
+    if profile is not None:
+        if profile not in DOCUMENT_PROFILES:
+            raise ValueError(f"Profil de document inconnu: {profile}")
+        entity_types = list(DOCUMENT_PROFILES[profile])
+    
+    extractor = get_entity_extractor()
+    result = extractor.extract_entities(text, entity_types)
     
     metadata = {
         'dates': [],
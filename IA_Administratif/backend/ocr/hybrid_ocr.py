@@ -3,13 +3,21 @@ Pipeline OCR hybride combinant TrOCR et Tesseract
 Utilise TrOCR pour la précision et Tesseract comme fallback fiable
 """
 
+import asyncio
 import logging
+import math
+import os
+import string
+import threading
 import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
-from typing import Union, Optional, List, Dict, Any, Tuple
+from typing import Union, Optional, List, Dict, Any, Tuple, Callable, Iterable, AsyncIterator
 from enum import Enum
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 
+import cv2
 import numpy as np
 from PIL import Image
 
@@ -22,6 +30,27 @@ from .memory_optimizer import MemoryOptimizer, memory_optimized
 
 logger = logging.getLogger(__name__)
 
+# Agrégation des composantes du score de résultat (confiance, longueur, mots, cohérence)
+SCORE_WEIGHTS = (0.4, 0.2, 0.2, 0.2)
+SCORE_AGGREGATORS = ("mean", "geomean", "min", "avg_log_prob")
+
+# Recouvrement minimal (IoU) pour que deux mots votent pour la même position en ENSEMBLE
+ENSEMBLE_IOU_THRESHOLD = 0.5
+
+# Intervalle (s) de vérification des moteurs encore en file d'attente du pool
+ENGINE_QUEUE_POLL_INTERVAL = 0.05
+
+# Workers du pool TrOCR + Tesseract (un par moteur)
+ENGINE_POOL_WORKERS = 2
+
+# Caractères jamais comptés comme "spéciaux" par le score de cohérence
+_COHERENCE_ALLOWED_PUNCT = ' .,!?;:\n-()[]{}'
+# Table supprimant l'alphanumérique ASCII et la ponctuation autorisée:
+# ce qui reste après translate() est candidat "caractère spécial"
+_COHERENCE_DELETE = str.maketrans('', '', string.ascii_letters + string.digits + _COHERENCE_ALLOWED_PUNCT)
+# En dessous de cette longueur, le score de cohérence vaut le score de base
+_COHERENCE_MIN_LENGTH = 8
+
 
 class OCRStrategy(Enum):
     """Stratégies de sélection du moteur OCR"""
@@ -32,26 +61,43 @@ class OCRStrategy(Enum):
     ENSEMBLE = "ensemble"  # Combine les résultats des deux
 
 
+# Stratégies dont le prétraitement est fait une seule fois par le moteur hybride
+# (pipeline ImagePreprocessor) puis partagé entre moteurs; TESSERACT_ONLY garde
+# le prétraitement léger propre à Tesseract
+SHARED_PREPROCESS_STRATEGIES = frozenset({
+    OCRStrategy.TROCR_ONLY,
+    OCRStrategy.TROCR_FALLBACK,
+    OCRStrategy.BEST_CONFIDENCE,
+    OCRStrategy.ENSEMBLE,
+})
+
+
 @dataclass
 class HybridOCRConfig:
     """Configuration pour le pipeline OCR hybride"""
     # Configuration TrOCR
     trocr_model: str = "microsoft/trocr-base-printed"
     trocr_confidence_threshold: float = 0.8
+    trocr_fast_path_threshold: float = 0.97  # Au-delà, résultat TrOCR accepté sans autre vérification
     trocr_enabled: bool = True
+    trocr_backend: str = "pytorch"  # pytorch | onnx | onnx-int8
+    trocr_quantization: str = "none"  # none | int8 (décodeur, backend onnx)
     
     # Configuration Tesseract
     tesseract_lang: str = "fra+eng"
     tesseract_confidence_threshold: float = 0.7
     tesseract_enabled: bool = True
+    tesseract_api_mode: str = "auto"  # auto | tesserocr (API persistante) | pytesseract
     
     # Configuration hybride
     strategy: OCRStrategy = OCRStrategy.TROCR_FALLBACK
     min_text_length: int = 10  # Longueur minimale pour considérer un résultat valide
+    score_aggregator: str = "avg_log_prob"  # mean | geomean | min | avg_log_prob
     preprocess_images: bool = True
     
     # Performance
     max_processing_time: float = 30.0  # Timeout en secondes
+    batch_size: int = 8  # Taille des lots TrOCR pour les traitements en masse (benchmark)
     enable_benchmarking: bool = False
     
     # Cache
@@ -59,6 +105,19 @@ class HybridOCRConfig:
     cache_dir: Optional[str] = None
 
 
+@dataclass
+class HybridStats:
+    """Compteurs d'utilisation du moteur hybride (accès protégé par le verrou du moteur)"""
+    total_processed: int = 0
+    trocr_used: int = 0
+    tesseract_used: int = 0
+    fallback_used: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    avg_processing_time: float = 0.0
+    success_rate: float = 0.0
+
+
 class HybridOCREngine:
     """
     Moteur OCR hybride combinant TrOCR et Tesseract
@@ -72,11 +131,19 @@ class HybridOCREngine:
             config: Configuration personnalisée
         """
         self.config = config or HybridOCRConfig()
+        if self.config.score_aggregator not in SCORE_AGGREGATORS:
+            raise ValueError(
+                f"Agrégateur de score inconnu: {self.config.score_aggregator} "
+                f"(disponibles: {', '.join(SCORE_AGGREGATORS)})"
+            )
+        self._strategy_label = self.config.strategy.value
         self.preprocessor = ImagePreprocessor()
         
-        # Initialisation différée des moteurs OCR (lazy loading)
-        self.trocr_engine = None
-        self.tesseract_engine = None
+        # Initialisation différée des moteurs OCR (lazy loading, moteur par moteur)
+        self._trocr_engine = None
+        self._tesseract_engine = None
+        self._engine_errors: Dict[str, str] = {}
+        self._engine_lock = threading.Lock()
         self._engines_initialized = False
         self._initialization_in_progress = False
         
@@ -102,103 +169,143 @@ class HybridOCREngine:
         )
         logger.info("🧠 Optimiseur de mémoire activé")
         
+        # Table stratégie -> méthode d'extraction
+        self._strategy_dispatch: Dict[OCRStrategy, Callable[[Any], OCRResult]] = {
+            OCRStrategy.TROCR_ONLY: self._extract_with_trocr_only,
+            OCRStrategy.TESSERACT_ONLY: self._extract_with_tesseract_only,
+            OCRStrategy.TROCR_FALLBACK: self._extract_with_fallback,
+            OCRStrategy.BEST_CONFIDENCE: self._extract_best_confidence,
+            OCRStrategy.ENSEMBLE: self._extract_ensemble,
+        }
+        
+        # Pool pour exécuter TrOCR (GPU) et Tesseract (sous-processus) en parallèle,
+        # remplacé si un moteur hors délai y bloque un worker (_replace_executor)
+        self._executor = ThreadPoolExecutor(max_workers=ENGINE_POOL_WORKERS, thread_name_prefix="hybrid_ocr")
+        self._executor_lock = threading.Lock()
+        # Pool de remplacement propre au thread courant (benchmark_performance)
+        self._thread_executor = threading.local()
+        
         # Ne pas initialiser immédiatement - attendre le premier usage
         logger.info("🚀 HybridOCREngine initialisé avec lazy loading")
         
-        # Statistiques étendues
-        self.stats = {
-            "total_processed": 0,
-            "trocr_used": 0,
-            "tesseract_used": 0,
-            "fallback_used": 0,
-            "cache_hits": 0,
-            "cache_misses": 0,
-            "avg_processing_time": 0.0,
-            "success_rate": 0.0
-        }
+        # Statistiques étendues (protégées par un verrou: extraction multi-thread)
+        self._stats_lock = threading.Lock()
+        self._stats = HybridStats()
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Instantané des compteurs sous forme de dictionnaire"""
+        with self._stats_lock:
+            return asdict(self._stats)
+    
+    @property
+    def trocr_engine(self) -> Optional[TrOCREngine]:
+        """Moteur TrOCR, chargé au premier accès s'il est activé"""
+        if self._trocr_engine is None and self.config.trocr_enabled and "trocr" not in self._engine_errors:
+            self._load_engine("trocr")
+        return self._trocr_engine
+    
+    @trocr_engine.setter
+    def trocr_engine(self, engine: Optional[TrOCREngine]):
+        self._trocr_engine = engine
     
-    def _ensure_engines_initialized(self):
-        """Assure que les moteurs OCR sont initialisés (lazy loading)"""
-        if self._engines_initialized:
-            return
-        
-        if self._initialization_in_progress:
-            # Attendre que l'initialisation en cours se termine
-            import time
-            max_wait = 30  # 30 secondes max
-            waited = 0
-            while self._initialization_in_progress and waited < max_wait:
-                time.sleep(0.1)
-                waited += 0.1
+    @property
+    def tesseract_engine(self) -> Optional[TesseractOCR]:
+        """Moteur Tesseract, chargé au premier accès s'il est activé"""
+        if self._tesseract_engine is None and self.config.tesseract_enabled and "tesseract" not in self._engine_errors:
+            self._load_engine("tesseract")
+        return self._tesseract_engine
+    
+    @tesseract_engine.setter
+    def tesseract_engine(self, engine: Optional[TesseractOCR]):
+        self._tesseract_engine = engine
+    
+    def _load_engine(self, name: str):
+        """
+        Charge un moteur OCR (thread-safe)
+        
+        Seul le moteur demandé est chargé: une stratégie Tesseract seule ne
+        paie jamais le coût de chargement de TrOCR. Un échec est mémorisé
+        pour ne pas retenter le chargement à chaque appel.
+        """
+        with self._engine_lock:
+            if getattr(self, f"_{name}_engine") is not None or name in self._engine_errors:
+                return
             
-            if not self._engines_initialized:
-                raise RuntimeError("Timeout lors de l'initialisation des moteurs OCR")
-            return
+            self._initialization_in_progress = True
+            logger.info(f"🔄 Initialisation du moteur {name} (première utilisation)...")
+            
+            try:
+                if name == "trocr":
+                    self._trocr_engine = self._create_trocr_engine()
+                else:
+                    self._tesseract_engine = self._create_tesseract_engine()
+                self._engines_initialized = True
+                logger.info(f"✅ Moteur {name} initialisé avec succès")
+            except Exception as e:
+                logger.error(f"❌ Erreur initialisation {name}: {e}")
+                self._engine_errors[name] = str(e)
+            finally:
+                self._initialization_in_progress = False
+    
+    def _create_trocr_engine(self) -> TrOCREngine:
+        """Instancie TrOCR et l'enregistre auprès de l'optimiseur mémoire"""
+        logger.info("Initialisation du moteur TrOCR...")
+        trocr_config = TrOCRConfig(
+            model_name=self.config.trocr_model,
+            confidence_threshold=self.config.trocr_confidence_threshold,
+            fallback_to_tesseract=False,  # On gère le fallback nous-mêmes
+            cache_dir=self.config.cache_dir,
+            backend=self.config.trocr_backend,
+            quantization=self.config.trocr_quantization
+        )
+        trocr_engine = TrOCREngine(trocr_config)
         
-        self._initialization_in_progress = True
-        logger.info("🔄 Initialisation des moteurs OCR (première utilisation)...")
+        # Enregistrer le modèle TrOCR pour monitoring mémoire
+        self._memory_optimizer.register_model(
+            "trocr_engine", 
+            trocr_engine,
+            cleanup_callback=self._cleanup_trocr
+        )
+        logger.info("TrOCR initialisé avec succès")
+        return trocr_engine
+    
+    def _create_tesseract_engine(self) -> TesseractOCR:
+        """Instancie Tesseract et l'enregistre auprès de l'optimiseur mémoire"""
+        logger.info("Initialisation du moteur Tesseract...")
+        tesseract_engine = TesseractOCR(
+            default_lang=self.config.tesseract_lang,
+            api_mode=self.config.tesseract_api_mode
+        )
         
-        try:
-            self._initialize_engines()
-            self._engines_initialized = True
-            logger.info("✅ Moteurs OCR initialisés avec succès")
-        except Exception as e:
-            logger.error(f"❌ Erreur initialisation OCR: {e}")
-            raise
-        finally:
-            self._initialization_in_progress = False
+        # Enregistrer Tesseract pour monitoring
+        self._memory_optimizer.register_model(
+            "tesseract_engine",
+            tesseract_engine,
+            cleanup_callback=self._cleanup_tesseract
+        )
+        logger.info("Tesseract initialisé avec succès")
+        return tesseract_engine
+    
+    def warmup(self):
+        """Charge immédiatement tous les moteurs activés (pour les appelants qui veulent éviter la latence du premier appel)"""
+        self._initialize_engines()
     
     @memory_optimized(cleanup_after=False, model_id="hybrid_ocr_engines")
     def _initialize_engines(self):
         """Initialise les moteurs OCR selon la configuration"""
-        try:
-            # Log mémoire avant initialisation
-            self._memory_optimizer.monitor.log_memory_stats("Avant init moteurs - ")
-            
-            # Initialisation TrOCR
-            if self.config.trocr_enabled:
-                logger.info("Initialisation du moteur TrOCR...")
-                trocr_config = TrOCRConfig(
-                    model_name=self.config.trocr_model,
-                    confidence_threshold=self.config.trocr_confidence_threshold,
-                    fallback_to_tesseract=False,  # On gère le fallback nous-mêmes
-                    cache_dir=self.config.cache_dir
-                )
-                self.trocr_engine = TrOCREngine(trocr_config)
-                
-                # Enregistrer le modèle TrOCR pour monitoring mémoire
-                self._memory_optimizer.register_model(
-                    "trocr_engine", 
-                    self.trocr_engine,
-                    cleanup_callback=self._cleanup_trocr
-                )
-                logger.info("TrOCR initialisé avec succès")
-            
-            # Initialisation Tesseract
-            if self.config.tesseract_enabled:
-                logger.info("Initialisation du moteur Tesseract...")
-                self.tesseract_engine = TesseractOCR(
-                    default_lang=self.config.tesseract_lang
-                )
-                
-                # Enregistrer Tesseract pour monitoring
-                self._memory_optimizer.register_model(
-                    "tesseract_engine",
-                    self.tesseract_engine,
-                    cleanup_callback=self._cleanup_tesseract
-                )
-                logger.info("Tesseract initialisé avec succès")
-            
-            # Vérification qu'au moins un moteur est disponible
-            if not self.trocr_engine and not self.tesseract_engine:
-                raise RuntimeError("Aucun moteur OCR n'a pu être initialisé")
-            
-            # Log mémoire après initialisation
-            self._memory_optimizer.monitor.log_memory_stats("Après init moteurs - ")
-                
-        except Exception as e:
-            logger.error(f"Erreur lors de l'initialisation des moteurs OCR: {str(e)}")
-            raise
+        # Log mémoire avant initialisation
+        self._memory_optimizer.monitor.log_memory_stats("Avant init moteurs - ")
+        
+        trocr_engine = self.trocr_engine
+        tesseract_engine = self.tesseract_engine
+        
+        # Vérification qu'au moins un moteur est disponible
+        if not trocr_engine and not tesseract_engine:
+            raise RuntimeError("Aucun moteur OCR n'a pu être initialisé")
+        
+        # Log mémoire après initialisation
+        self._memory_optimizer.monitor.log_memory_stats("Après init moteurs - ")
     
     def extract_text(
         self,
@@ -215,117 +322,531 @@ class HybridOCREngine:
         Returns:
             Résultat OCR optimal
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         strategy = strategy or self.config.strategy
         
-        # Vérifier le cache d'abord
-        if self.cache_manager:
-            cached_result = self.cache_manager.get_cached_result(
-                image, 
-                f"hybrid_{strategy.value}",
-                {"strategy": strategy.value}
-            )
-            if cached_result:
-                self.stats["cache_hits"] += 1
-                self.stats["total_processed"] += 1
-                processing_time = time.time() - start_time
-                cached_result.quality_metrics["from_cache"] = True
-                cached_result.quality_metrics["cache_retrieval_time"] = processing_time
-                logger.info(f"🎯 Cache hit pour stratégie {strategy} ({processing_time:.3f}s)")
-                return cached_result
-            else:
-                self.stats["cache_misses"] += 1
-        
-        # Initialisation différée des moteurs OCR
-        self._ensure_engines_initialized()
-        
-        logger.info(f"Extraction hybride avec stratégie: {strategy}")
+        # Vérifier le cache d'abord (clé calculée une seule fois par appel)
+        cache_key, cached_result = self._lookup_cache(image, strategy, start_time)
+        if cached_result:
+            return cached_result
         
+        logger.info(f"Extraction hybride avec stratégie: {strategy.value}")
+        return self._extract_uncached(image, cache_key, strategy, start_time)
+    
+    def _extract_uncached(
+        self,
+        image,
+        cache_key: Optional[str],
+        strategy: OCRStrategy,
+        start_time: float,
+        processed_image=None
+    ) -> OCRResult:
+        """
+        Extraction d'une image absente du cache (cache déjà consulté), avec
+        fallback d'urgence. Prétraitement si processed_image n'est pas fourni
+        """
         try:
-            # Prétraitement si activé
-            processed_image = self._preprocess_if_needed(image)
-            
-            # Sélection de la stratégie
-            if strategy == OCRStrategy.TROCR_ONLY:
-                result = self._extract_with_trocr_only(processed_image)
-            elif strategy == OCRStrategy.TESSERACT_ONLY:
-                result = self._extract_with_tesseract_only(processed_image)
-            elif strategy == OCRStrategy.TROCR_FALLBACK:
-                result = self._extract_with_fallback(processed_image)
-            elif strategy == OCRStrategy.BEST_CONFIDENCE:
-                result = self._extract_best_confidence(processed_image)
-            elif strategy == OCRStrategy.ENSEMBLE:
-                result = self._extract_ensemble(processed_image)
-            else:
-                raise ValueError(f"Stratégie non supportée: {strategy}")
-            
-            # Mise à jour des statistiques
-            self._update_stats(result, time.time() - start_time)
-            
-            # Mettre en cache le résultat si le cache est activé
-            if self.cache_manager and result.confidence > 0.1:  # Ne cacher que les résultats valides
-                try:
-                    self.cache_manager.cache_result(
-                        image,
-                        f"hybrid_{strategy.value}",
-                        result,
-                        {"strategy": strategy.value}
-                    )
-                    logger.debug(f"💾 Résultat mis en cache pour stratégie {strategy}")
-                except Exception as cache_error:
-                    logger.warning(f"Erreur mise en cache: {cache_error}")
-            
-            return result
+            if processed_image is None:
+                processed_image = self._preprocess_if_needed(image, strategy)
+            return self._run_strategy(image, processed_image, cache_key, strategy, start_time)
             
         except Exception as e:
             logger.error(f"Erreur lors de l'extraction hybride: {str(e)}")
+            return self._recover_from_failure(image, strategy, e, start_time)
+    
+    def _run_strategy(
+        self,
+        image,
+        processed_image,
+        cache_key: Optional[str],
+        strategy: OCRStrategy,
+        start_time: float
+    ) -> OCRResult:
+        """Exécute la stratégie sur une image déjà décodée/prétraitée, puis statistiques et cache"""
+        handler = self._strategy_dispatch.get(strategy)
+        if handler is None:
+            raise ValueError(f"Stratégie non supportée: {strategy}")
+        result = handler(processed_image)
+        result.quality_metrics["preprocess_variant"] = self._preprocess_variant(strategy)
+        
+        # Mise à jour des statistiques
+        self._update_stats(result, time.perf_counter() - start_time)
+        
+        # Mettre en cache le résultat si le cache est activé
+        self._cache_result(image, cache_key, strategy, result)
+        
+        return result
+    
+    async def extract_text_async(
+        self,
+        image: Union[str, Path, np.ndarray, Image.Image],
+        strategy: Optional[OCRStrategy] = None
+    ) -> OCRResult:
+        """
+        Version asynchrone de extract_text
+        
+        Lecture du cache, décodage et prétraitement puis OCR s'exécutent dans
+        des threads: la boucle d'événements reste libre pendant les I/O disque.
+        
+        Args:
+            image: Image à traiter
+            strategy: Stratégie spécifique à utiliser (override la config)
             
-            # Fallback d'urgence vers Tesseract si disponible
-            if self.tesseract_engine and strategy != OCRStrategy.TESSERACT_ONLY:
-                try:
-                    logger.info("Fallback d'urgence vers Tesseract")
-                    result = self.tesseract_engine.extract_text(image, preprocess=False)
-                    result.quality_metrics["emergency_fallback"] = True
-                    result.quality_metrics["original_error"] = str(e)
-                    return result
-                except:
-                    pass
+        Returns:
+            Résultat OCR optimal
+        """
+        start_time = time.perf_counter()
+        strategy = strategy or self.config.strategy
+        
+        cache_key, cached_result = await asyncio.to_thread(self._lookup_cache, image, strategy, start_time)
+        if cached_result:
+            return cached_result
+        
+        logger.info(f"Extraction hybride asynchrone avec stratégie: {strategy.value}")
+        
+        try:
+            processed_image = await asyncio.to_thread(self._preprocess_if_needed, image, strategy)
+        except Exception as e:
+            return await self._recover_async(image, strategy, e, start_time)
+        return await self._run_strategy_async(image, processed_image, cache_key, strategy, start_time)
+    
+    async def extract_text_stream(
+        self,
+        images: Iterable[Union[str, Path, np.ndarray, Image.Image]],
+        strategy: Optional[OCRStrategy] = None,
+        prefetch: int = 2
+    ) -> AsyncIterator[OCRResult]:
+        """
+        Pipeline décodage → OCR: les images suivantes sont décodées et
+        prétraitées pendant l'OCR de l'image courante
+        
+        Args:
+            images: Images à traiter (chemins de préférence)
+            strategy: Stratégie spécifique à utiliser (override la config)
+            prefetch: Nombre maximal d'images décodées en attente d'OCR
             
-            # Retour d'un résultat vide si tout échoue
-            return OCRResult(
-                text="",
-                confidence=0.0,
-                language="unknown",
-                processing_time=time.time() - start_time,
-                word_count=0,
-                line_count=0,
-                bbox_data=[],
-                detected_entities={},
-                quality_metrics={"error": str(e), "strategy": str(strategy)}
+        Yields:
+            Résultats OCR, dans l'ordre des images
+        """
+        strategy = strategy or self.config.strategy
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, prefetch))
+        
+        async def decode_images():
+            # Fin de flux (None) ou erreur du décodeur toujours transmise au
+            # consommateur, sinon il attendrait indéfiniment sur la file
+            end: Optional[Exception] = None
+            try:
+                for image in images:
+                    start_time = time.perf_counter()
+                    cache_key, cached_result = await asyncio.to_thread(self._lookup_cache, image, strategy, start_time)
+                    processed_image, error = None, None
+                    if not cached_result:
+                        try:
+                            processed_image = await asyncio.to_thread(self._preprocess_if_needed, image, strategy)
+                        except Exception as e:
+                            error = e
+                    await queue.put((image, start_time, cache_key, cached_result, processed_image, error))
+            except Exception as e:
+                end = e
+            finally:
+                # Pas de sentinelle si le consommateur a annulé le décodeur
+                if not asyncio.current_task().cancelling():
+                    await queue.put(end)
+        
+        decoder = asyncio.create_task(decode_images())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    # Erreur de l'itérable d'images ou de la lecture du cache
+                    raise item
+                image, start_time, cache_key, cached_result, processed_image, error = item
+                if cached_result:
+                    yield cached_result
+                elif error is not None:
+                    yield await self._recover_async(image, strategy, error, start_time)
+                else:
+                    yield await self._run_strategy_async(image, processed_image, cache_key, strategy, start_time)
+        finally:
+            decoder.cancel()
+    
+    async def _run_strategy_async(
+        self,
+        image,
+        processed_image,
+        cache_key: Optional[str],
+        strategy: OCRStrategy,
+        start_time: float
+    ) -> OCRResult:
+        """OCR dans un thread du pool par défaut, avec le même fallback que extract_text"""
+        # Pas self._executor: ses workers servent aux stratégies multi-moteurs
+        try:
+            return await asyncio.to_thread(
+                self._run_strategy, image, processed_image, cache_key, strategy, start_time
             )
+        except Exception as e:
+            return await self._recover_async(image, strategy, e, start_time)
     
-    def _preprocess_if_needed(self, image: Union[str, Path, np.ndarray, Image.Image]) -> Union[str, Path, np.ndarray, Image.Image]:
-        """Applique le prétraitement si configuré"""
-        if not self.config.preprocess_images:
-            return image
+    async def _recover_async(
+        self,
+        image,
+        strategy: OCRStrategy,
+        error: Exception,
+        start_time: float
+    ) -> OCRResult:
+        """Fallback d'urgence exécuté hors de la boucle d'événements"""
+        logger.error(f"Erreur lors de l'extraction hybride: {str(error)}")
+        return await asyncio.to_thread(self._recover_from_failure, image, strategy, error, start_time)
+    
+    def extract_text_batch(
+        self,
+        images: List[Union[str, Path, np.ndarray, Image.Image]],
+        strategy: Optional[OCRStrategy] = None
+    ) -> List[OCRResult]:
+        """
+        Extrait le texte d'un lot d'images
+        
+        TrOCR traite les images en une passe batchée (pixel_values empilés),
+        Tesseract est parallélisé sur un pool de threads. Les stratégies
+        BEST_CONFIDENCE et ENSEMBLE sont traitées image par image.
+        
+        Args:
+            images: Images à traiter
+            strategy: Stratégie spécifique à utiliser (override la config)
+            
+        Returns:
+            Résultats OCR dans l'ordre des images
+        """
+        start_time = time.perf_counter()
+        strategy = strategy or self.config.strategy
+        
+        if strategy not in (OCRStrategy.TROCR_ONLY, OCRStrategy.TESSERACT_ONLY, OCRStrategy.TROCR_FALLBACK):
+            return [self.extract_text(image, strategy) for image in images]
+        
+        results: List[Optional[OCRResult]] = [None] * len(images)
+        cache_keys = [self._make_cache_key(image, strategy) for image in images]
+        pending = []
+        for index, image in enumerate(images):
+            cached_result = self._get_cached_result(image, cache_keys[index], strategy, start_time)
+            if cached_result:
+                results[index] = cached_result
+            else:
+                pending.append(index)
         
+        if not pending:
+            return results
+        
+        # Moteur requis indisponible (chargé à la demande): le chemin unitaire gère les fallbacks d'urgence
+        if ((strategy == OCRStrategy.TROCR_ONLY and not self.trocr_engine) or
+                (strategy == OCRStrategy.TESSERACT_ONLY and not self.tesseract_engine)):
+            for index in pending:
+                results[index] = self._extract_uncached(images[index], cache_keys[index], strategy, start_time)
+            return results
+        
+        logger.info(f"Extraction hybride batch de {len(pending)} images avec stratégie: {strategy.value}")
+        
+        processed = {index: self._preprocess_if_needed(images[index], strategy) for index in pending}
+        engine_preprocess = self._engine_preprocess(strategy)
+        tesseract_pending = pending
+        # Images déjà comptées (stats, cache) ou en échec: exclues du bilan final
+        accounted = set()
+        
+        if strategy != OCRStrategy.TESSERACT_ONLY and self.trocr_engine:
+            tesseract_pending = []
+            try:
+                trocr_results = self.trocr_engine.extract_text_batch(
+                    [processed[index] for index in pending],
+                    preprocess=False  # Prétraitement partagé déjà appliqué
+                )
+            except Exception as e:
+                logger.warning(f"Erreur batch TrOCR: {e}")
+                trocr_results = [None] * len(pending)
+            
+            for index, trocr_result in zip(pending, trocr_results):
+                if strategy == OCRStrategy.TROCR_ONLY:
+                    if trocr_result is None:
+                        # Reprise unitaire sur l'image déjà prétraitée (stats et cache mis à jour)
+                        results[index] = self._extract_uncached(
+                            images[index], cache_keys[index], strategy, start_time, processed[index]
+                        )
+                        accounted.add(index)
+                        continue
+                    trocr_result.quality_metrics["strategy_used"] = "trocr_only"
+                    self._increment_stat("trocr_used")
+                    results[index] = trocr_result
+                elif trocr_result is not None and self._is_trocr_fast_path(trocr_result):
+                    trocr_result.quality_metrics["strategy_used"] = "trocr_fast_path"
+                    self._increment_stat("trocr_used")
+                    results[index] = trocr_result
+                elif trocr_result is not None and self._is_result_acceptable(trocr_result, "trocr"):
+                    trocr_result.quality_metrics["strategy_used"] = "trocr_primary"
+                    self._increment_stat("trocr_used")
+                    results[index] = trocr_result
+                else:
+                    tesseract_pending.append(index)
+        
+        # Second lot: Tesseract (rejets TrOCR ou stratégie Tesseract seule)
+        if tesseract_pending:
+            is_fallback = strategy == OCRStrategy.TROCR_FALLBACK
+            for index, tesseract_result in zip(
+                tesseract_pending,
+                self._run_tesseract_batch(
+                    [processed[index] for index in tesseract_pending], engine_preprocess
+                )
+            ):
+                if isinstance(tesseract_result, Exception):
+                    logger.error(f"Erreur Tesseract sur image {index} du batch: {tesseract_result}")
+                    error = (RuntimeError("Tous les moteurs OCR ont échoué") if is_fallback
+                             else tesseract_result)
+                    results[index] = self._recover_from_failure(images[index], strategy, error, start_time)
+                    accounted.add(index)
+                    continue
+                
+                if is_fallback:
+                    tesseract_result.quality_metrics["strategy_used"] = "tesseract_fallback"
+                    tesseract_result.quality_metrics["fallback_reason"] = "trocr_insufficient"
+                    self._increment_stat("fallback_used")
+                else:
+                    tesseract_result.quality_metrics["strategy_used"] = "tesseract_only"
+                self._increment_stat("tesseract_used")
+                results[index] = tesseract_result
+        
+        # Statistiques (temps moyen par image du lot) et mise en cache
+        per_image_time = (time.perf_counter() - start_time) / len(pending)
+        preprocess_variant = self._preprocess_variant(strategy)
+        for index in pending:
+            if index in accounted:
+                continue
+            results[index].quality_metrics["preprocess_variant"] = preprocess_variant
+            self._update_stats(results[index], per_image_time)
+            self._cache_result(images[index], cache_keys[index], strategy, results[index])
+        
+        return results
+    
+    def _run_tesseract_batch(self, images: List[Any], preprocess: bool) -> List[Union[OCRResult, Exception]]:
+        """Exécute Tesseract sur plusieurs images en parallèle (une exception par image en échec)"""
+        def run(image):
+            try:
+                return self.tesseract_engine.extract_text(image, preprocess=preprocess)
+            except Exception as e:
+                return e
+        
+        if not self.tesseract_engine:
+            return [RuntimeError("Tesseract non disponible")] * len(images)
+        
+        if len(images) == 1:
+            return [run(images[0])]
+        
+        max_workers = min(len(images), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tesseract_batch") as executor:
+            return list(executor.map(run, images))
+    
+    def _cache_params(self, strategy: OCRStrategy) -> Dict[str, Any]:
+        """Paramètres qui différencient les entrées de cache"""
+        return {
+            "strategy": strategy.value,
+            "trocr_model": self.config.trocr_model,
+            "tesseract_lang": self.config.tesseract_lang
+        }
+    
+    def _make_cache_key(self, image, strategy: OCRStrategy) -> Optional[str]:
+        """Clé de cache basée sur le contenu de l'image (None si cache désactivé)"""
+        if not self.cache_manager:
+            return None
+        
+        return ImageHasher.generate_cache_key(
+            image,
+            f"hybrid_{strategy.value}",
+            self._cache_params(strategy)
+        )
+    
+    def _lookup_cache(
+        self,
+        image,
+        strategy: OCRStrategy,
+        start_time: float
+    ) -> Tuple[Optional[str], Optional[OCRResult]]:
+        """Calcule la clé de cache et consulte le cache"""
+        cache_key = self._make_cache_key(image, strategy)
+        return cache_key, self._get_cached_result(image, cache_key, strategy, start_time)
+    
+    def _get_cached_result(
+        self,
+        image,
+        cache_key: Optional[str],
+        strategy: OCRStrategy,
+        start_time: float
+    ) -> Optional[OCRResult]:
+        """Consulte le cache pour une image et met à jour les compteurs hit/miss"""
+        if not self.cache_manager:
+            return None
+        
+        cached_result = self.cache_manager.get_cached_result(
+            image, 
+            f"hybrid_{strategy.value}",
+            self._cache_params(strategy),
+            cache_key=cache_key
+        )
+        if cached_result:
+            self._increment_stat("cache_hits")
+            self._increment_stat("total_processed")
+            processing_time = time.perf_counter() - start_time
+            cached_result.quality_metrics["from_cache"] = True
+            cached_result.quality_metrics["cache_retrieval_time"] = processing_time
+            logger.info(f"🎯 Cache hit pour stratégie {strategy.value} ({processing_time:.3f}s)")
+            return cached_result
+        
+        self._increment_stat("cache_misses")
+        return None
+    
+    def _cache_result(self, image, cache_key: Optional[str], strategy: OCRStrategy, result: OCRResult):
+        """Met en cache un résultat valide"""
+        if self.cache_manager and result.confidence > 0.1:  # Ne cacher que les résultats valides
+            try:
+                self.cache_manager.cache_result(
+                    image,
+                    f"hybrid_{strategy.value}",
+                    result,
+                    self._cache_params(strategy),
+                    cache_key=cache_key
+                )
+                logger.debug(f"💾 Résultat mis en cache pour stratégie {strategy.value}")
+            except Exception as cache_error:
+                logger.warning(f"Erreur mise en cache: {cache_error}")
+    
+    def _recover_from_failure(
+        self,
+        image,
+        strategy: OCRStrategy,
+        error: Exception,
+        start_time: float
+    ) -> OCRResult:
+        """Fallback d'urgence vers Tesseract, puis résultat vide si tout échoue"""
+        # Fallback d'urgence vers Tesseract si disponible
+        if self.tesseract_engine and strategy != OCRStrategy.TESSERACT_ONLY:
+            try:
+                logger.info("Fallback d'urgence vers Tesseract")
+                result = self.tesseract_engine.extract_text(image, preprocess=False)
+                result.quality_metrics["emergency_fallback"] = True
+                result.quality_metrics["original_error"] = str(error)
+                return result
+            except:
+                pass
+        
+        # Retour d'un résultat vide si tout échoue
+        return OCRResult(
+            text="",
+            confidence=0.0,
+            language="unknown",
+            processing_time=time.perf_counter() - start_time,
+            word_count=0,
+            line_count=0,
+            bbox_data=[],
+            detected_entities={},
+            quality_metrics={"error": str(error), "strategy": strategy.value}
+        )
+    
+    @staticmethod
+    def _to_numpy(image: Union[np.ndarray, Image.Image]) -> np.ndarray:
+        """
+        Convertit une image en tableau numpy sans copie
+        
+        Le décodage PIL est forcé une seule fois (load) puis np.asarray
+        réutilise le buffer de l'image: le tableau retourné partage sa mémoire
+        avec l'image source et doit être traité en lecture seule.
+        """
+        if isinstance(image, np.ndarray):
+            return image
+        image.load()
+        return np.asarray(image)
+    
+    def _preprocess_if_needed(
+        self,
+        image: Union[str, Path, np.ndarray, Image.Image],
+        strategy: Optional[OCRStrategy] = None
+    ) -> Union[str, Path, np.ndarray, Image.Image]:
+        """
+        Décode l'image une seule fois et applique le prétraitement si configuré
+        
+        Les chemins de fichiers sont décodés ici (première page à 300 dpi pour
+        les PDFs, comme le font les moteurs) afin que TrOCR et Tesseract
+        reçoivent la même image en mémoire au lieu de relire le fichier.
+        Pour les stratégies utilisant TrOCR, le pipeline ImagePreprocessor est
+        exécuté une seule fois ici et les moteurs sont appelés sans
+        prétraitement (preprocess=False).
+        """
         try:
-            # Pour l'instant, on retourne l'image originale
-            # Le prétraitement sera fait individuellement par chaque moteur
+            if isinstance(image, (str, Path)):
+                image = self._decode_image_file(image)
+        except Exception as e:
+            logger.warning(f"Erreur décodage, utilisation du chemin original: {e}")
             return image
+        
+        if self._preprocess_variant(strategy or self.config.strategy) != "shared":
+            return image
+        
+        try:
+            return self._apply_shared_preprocessing(image)
         except Exception as e:
             logger.warning(f"Erreur prétraitement, utilisation image originale: {e}")
             return image
     
+    def _preprocess_variant(self, strategy: OCRStrategy) -> str:
+        """Prétraitement appliqué pour une stratégie: "shared", "engine" ou "none" """
+        if not self.config.preprocess_images:
+            return "none"
+        return "shared" if strategy in SHARED_PREPROCESS_STRATEGIES else "engine"
+    
+    def _engine_preprocess(self, strategy: OCRStrategy) -> bool:
+        """Indique si les moteurs doivent prétraiter eux-mêmes l'image"""
+        return self._preprocess_variant(strategy) == "engine"
+    
+    def _apply_shared_preprocessing(self, image: Union[np.ndarray, Image.Image]) -> Image.Image:
+        """
+        Pipeline ImagePreprocessor unique (rotation, débruitage, bordures, contraste)
+        
+        Reproduit les conversions de TrOCR (image BGR en entrée du
+        préprocesseur, image PIL RGB en sortie).
+        """
+        if isinstance(image, np.ndarray):
+            bgr_image = image if image.ndim == 3 else cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        else:
+            bgr_image = cv2.cvtColor(self._to_numpy(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+        
+        processed_image = self.preprocessor.process_image_array(bgr_image)
+        if processed_image.ndim == 3:
+            processed_image = cv2.cvtColor(processed_image, cv2.COLOR_BGR2RGB)
+        return Image.fromarray(processed_image)
+    
+    @staticmethod
+    def _decode_image_file(path: Union[str, Path]) -> Image.Image:
+        """Charge un fichier image ou la première page d'un PDF en mémoire"""
+        image_path = str(path)
+        
+        if image_path.lower().endswith('.pdf'):
+            from pdf2image import convert_from_path
+            pages = convert_from_path(image_path, first_page=1, last_page=1, dpi=300)
+            if not pages:
+                raise ValueError("PDF vide ou non lisible")
+            return pages[0].convert('RGB')
+        
+        # Décodage immédiat (Image.open est paresseux): mode d'origine conservé,
+        # chaque moteur applique sa propre conversion
+        pil_image = Image.open(image_path)
+        pil_image.load()
+        return pil_image
+    
     def _extract_with_trocr_only(self, image) -> OCRResult:
         """Extraction avec TrOCR uniquement"""
         if not self.trocr_engine:
             raise RuntimeError("TrOCR non disponible")
         
         logger.debug("Extraction TrOCR uniquement")
-        result = self.trocr_engine.extract_text(image, preprocess=self.config.preprocess_images)
+        result = self.trocr_engine.extract_text(image, preprocess=False)
         result.quality_metrics["strategy_used"] = "trocr_only"
-        self.stats["trocr_used"] += 1
+        self._increment_stat("trocr_used")
         
         return result
     
@@ -335,9 +856,11 @@ class HybridOCREngine:
             raise RuntimeError("Tesseract non disponible")
         
         logger.debug("Extraction Tesseract uniquement")
-        result = self.tesseract_engine.extract_text(image, preprocess=self.config.preprocess_images)
+        result = self.tesseract_engine.extract_text(
+            image, preprocess=self._engine_preprocess(OCRStrategy.TESSERACT_ONLY)
+        )
         result.quality_metrics["strategy_used"] = "tesseract_only"
-        self.stats["tesseract_used"] += 1
+        self._increment_stat("tesseract_used")
         
         return result
     
@@ -350,14 +873,20 @@ class HybridOCREngine:
             try:
                 trocr_result = self.trocr_engine.extract_text(
                     image, 
-                    preprocess=self.config.preprocess_images,
+                    preprocess=False,
                     use_fallback=False
                 )
                 
+                # Confiance clairement excellente: pas de vérification supplémentaire
+                if self._is_trocr_fast_path(trocr_result):
+                    trocr_result.quality_metrics["strategy_used"] = "trocr_fast_path"
+                    self._increment_stat("trocr_used")
+                    return trocr_result
+                
                 # Vérifier si le résultat TrOCR est acceptable
                 if self._is_result_acceptable(trocr_result, "trocr"):
                     trocr_result.quality_metrics["strategy_used"] = "trocr_primary"
-                    self.stats["trocr_used"] += 1
+                    self._increment_stat("trocr_used")
                     return trocr_result
                 
                 logger.info(f"Résultat TrOCR non satisfaisant (confiance: {trocr_result.confidence:.3f}), "
@@ -371,12 +900,12 @@ class HybridOCREngine:
             try:
                 tesseract_result = self.tesseract_engine.extract_text(
                     image, 
-                    preprocess=self.config.preprocess_images
+                    preprocess=False
                 )
                 tesseract_result.quality_metrics["strategy_used"] = "tesseract_fallback"
                 tesseract_result.quality_metrics["fallback_reason"] = "trocr_insufficient"
-                self.stats["tesseract_used"] += 1
-                self.stats["fallback_used"] += 1
+                self._increment_stat("tesseract_used")
+                self._increment_stat("fallback_used")
                 
                 return tesseract_result
                 
@@ -386,42 +915,122 @@ class HybridOCREngine:
         # Si tout échoue
         raise RuntimeError("Tous les moteurs OCR ont échoué")
     
-    def _extract_best_confidence(self, image) -> OCRResult:
-        """Extraction avec les deux moteurs, retourne le meilleur"""
-        logger.debug("Extraction avec sélection du meilleur résultat")
+    def _run_engines_concurrently(self, image) -> List[Tuple[str, OCRResult]]:
+        """
+        Exécute TrOCR et Tesseract en parallèle sur la même image
         
-        results = []
+        Le délai max_processing_time de chaque moteur court à partir de son
+        démarrage effectif; l'attente dans la file du pool (partagé entre
+        les requêtes concurrentes) est bornée par le même délai. L'appel dure
+        donc au plus deux fois max_processing_time.
         
-        # Essayer TrOCR
-        if self.trocr_engine:
-            try:
-                trocr_result = self.trocr_engine.extract_text(image, preprocess=self.config.preprocess_images)
-                trocr_result.quality_metrics["engine"] = "trocr"
-                results.append(trocr_result)
-                self.stats["trocr_used"] += 1
-            except Exception as e:
-                logger.warning(f"Erreur TrOCR: {e}")
+        Returns:
+            Résultats réussis dans l'ordre (trocr, tesseract); un moteur en
+            erreur ou hors délai est ignoré
+        """
+        call_start = time.monotonic()
+        max_time = self.config.max_processing_time
+        executor = self._engine_executor()
+        started: Dict[str, float] = {}
+        
+        def run(engine: str, extract: Callable) -> OCRResult:
+            started[engine] = time.monotonic()
+            return extract(image, preprocess=False)
         
-        # Essayer Tesseract
+        futures = []
+        if self.trocr_engine:
+            futures.append(("trocr", executor.submit(run, "trocr", self.trocr_engine.extract_text)))
         if self.tesseract_engine:
+            futures.append(("tesseract", executor.submit(run, "tesseract", self.tesseract_engine.extract_text)))
+        
+        timed_out = set()
+        worker_stuck = False
+        while True:
+            waiting = [(engine, future) for engine, future in futures
+                       if not future.done() and engine not in timed_out]
+            if not waiting:
+                break
+            
+            # Attente jusqu'à la première échéance, ou brève tant qu'un moteur est en file
+            now = time.monotonic()
+            timeout = None
+            for engine, future in waiting:
+                start = started.get(engine)
+                if start is None:
+                    # Encore en file: retiré du pool à l'échéance
+                    queue_remaining = call_start + max_time - now
+                    if queue_remaining <= 0 and future.cancel():
+                        timed_out.add(engine)
+                        continue
+                    # cancel() en échec: le moteur vient de démarrer
+                    remaining = ENGINE_QUEUE_POLL_INTERVAL if queue_remaining <= 0 else min(ENGINE_QUEUE_POLL_INTERVAL, queue_remaining)
+                else:
+                    remaining = start + max_time - now
+                    if remaining <= 0:
+                        timed_out.add(engine)
+                        worker_stuck = True
+                        continue
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            
+            if timeout is not None:
+                wait([future for engine, future in waiting if engine not in timed_out],
+                     timeout=timeout, return_when=FIRST_COMPLETED)
+        
+        if worker_stuck:
+            self._replace_executor(executor)
+        
+        results = []
+        for engine, future in futures:
+            if engine in timed_out:
+                logger.warning(f"Timeout {engine} après {max_time}s")
+                continue
             try:
-                tesseract_result = self.tesseract_engine.extract_text(image, preprocess=self.config.preprocess_images)
-                tesseract_result.quality_metrics["engine"] = "tesseract"
-                results.append(tesseract_result)
-                self.stats["tesseract_used"] += 1
+                results.append((engine, future.result()))
             except Exception as e:
-                logger.warning(f"Erreur Tesseract: {e}")
+                logger.warning(f"Erreur {engine}: {e}")
+                continue
+            self._increment_stat(f"{engine}_used")
+        
+        return results
+    
+    def _engine_executor(self) -> ThreadPoolExecutor:
+        """Pool des moteurs pour le thread courant (celui du benchmark s'il y en a un)"""
+        return getattr(self._thread_executor, "executor", None) or self._executor
+    
+    def _replace_executor(self, executor: ThreadPoolExecutor):
+        """
+        Remplace le pool partagé dont un worker reste bloqué sur un moteur hors
+        délai: les appels suivants ne restent pas en file derrière lui
+        """
+        with self._executor_lock:
+            if self._executor is not executor:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=ENGINE_POOL_WORKERS, thread_name_prefix="hybrid_ocr")
+        # Les tâches déjà soumises à l'ancien pool s'y terminent
+        executor.shutdown(wait=False)
+        logger.warning("Pool des moteurs OCR remplacé: un moteur hors délai bloque un worker")
+    
+    def _extract_best_confidence(self, image) -> OCRResult:
+        """Extraction avec les deux moteurs, retourne le meilleur"""
+        logger.debug("Extraction avec sélection du meilleur résultat")
+        
+        results = []
+        for engine, result in self._run_engines_concurrently(image):
+            result.quality_metrics["engine"] = engine
+            results.append(result)
         
         if not results:
             raise RuntimeError("Aucun moteur OCR n'a réussi")
         
-        # Sélectionner le meilleur résultat
-        best_result = max(results, key=lambda r: self._calculate_result_score(r))
+        # Sélectionner le meilleur résultat (score calculé une fois par résultat)
+        best_score, best_result = max(
+            ((self._calculate_result_score(r), r) for r in results), key=lambda item: item[0]
+        )
         best_result.quality_metrics["strategy_used"] = "best_confidence"
         best_result.quality_metrics["alternatives_count"] = len(results) - 1
         
         logger.info(f"Meilleur résultat: {best_result.quality_metrics.get('engine', 'unknown')} "
-                   f"(score: {self._calculate_result_score(best_result):.3f})")
+                   f"(score: {best_score:.3f})")
         
         return best_result
     
@@ -429,24 +1038,8 @@ class HybridOCREngine:
         """Extraction ensemble combinant TrOCR et Tesseract"""
         logger.debug("Extraction ensemble (combinaison des résultats)")
         
-        results = []
-        
         # Exécuter les deux moteurs
-        if self.trocr_engine:
-            try:
-                trocr_result = self.trocr_engine.extract_text(image, preprocess=self.config.preprocess_images)
-                results.append(("trocr", trocr_result))
-                self.stats["trocr_used"] += 1
-            except Exception as e:
-                logger.warning(f"Erreur TrOCR: {e}")
-        
-        if self.tesseract_engine:
-            try:
-                tesseract_result = self.tesseract_engine.extract_text(image, preprocess=self.config.preprocess_images)
-                results.append(("tesseract", tesseract_result))
-                self.stats["tesseract_used"] += 1
-            except Exception as e:
-                logger.warning(f"Erreur Tesseract: {e}")
+        results = self._run_engines_concurrently(image)
         
         if not results:
             raise RuntimeError("Aucun moteur OCR n'a réussi")
@@ -464,6 +1057,10 @@ class HybridOCREngine:
         
         return combined_result
     
+    def _is_trocr_fast_path(self, result: OCRResult) -> bool:
+        """Résultat TrOCR assez sûr pour court-circuiter les contrôles d'acceptabilité"""
+        return result.confidence >= self.config.trocr_fast_path_threshold and result.word_count > 0
+    
     def _is_result_acceptable(self, result: OCRResult, engine: str) -> bool:
         """Vérifie si un résultat OCR est acceptable"""
         # Vérification du seuil de confiance
@@ -484,87 +1081,185 @@ class HybridOCREngine:
         return True
     
     def _calculate_result_score(self, result: OCRResult) -> float:
-        """Calcule un score composite pour évaluer la qualité d'un résultat"""
-        score = 0.0
-        
-        # Score de confiance (poids: 40%)
-        score += result.confidence * 0.4
-        
-        # Longueur du texte (poids: 20%)
-        text_length_score = min(1.0, len(result.text.strip()) / 100.0)  # Normaliser à 100 caractères
-        score += text_length_score * 0.2
+        """
+        Calcule un score composite pour évaluer la qualité d'un résultat
         
-        # Nombre de mots (poids: 20%)
-        word_count_score = min(1.0, result.word_count / 50.0)  # Normaliser à 50 mots
-        score += word_count_score * 0.2
+        Composantes: confiance (40%), longueur du texte (20%), nombre de
+        mots (20%) et cohérence (20%), agrégées selon config.score_aggregator.
+        "mean" est la moyenne pondérée historique; "avg_log_prob" (moyenne
+        pondérée des logarithmes) et "min" pénalisent un résultat dont une
+        seule composante s'effondre (ex: confiance parfaite mais 2 mots).
+        """
+        components = (
+            result.confidence,
+            min(1.0, len(result.text.strip()) / 100.0),  # Normaliser à 100 caractères
+            min(1.0, result.word_count / 50.0),  # Normaliser à 50 mots
+            self._calculate_text_coherence(result.text)
+        )
         
-        # Cohérence du texte (poids: 20%)
-        coherence_score = self._calculate_text_coherence(result.text)
-        score += coherence_score * 0.2
+        aggregator = self.config.score_aggregator
+        if aggregator == "mean":
+            return sum(weight * value for weight, value in zip(SCORE_WEIGHTS, components))
+        if aggregator == "min":
+            return min(components)
         
-        return score
+        logs = [math.log(min(1.0, max(1e-6, value))) for value in components]
+        if aggregator == "geomean":
+            return math.exp(sum(logs) / len(logs))
+        return math.exp(sum(weight * log for weight, log in zip(SCORE_WEIGHTS, logs)))
     
     def _calculate_text_coherence(self, text: str) -> float:
         """Calcule un score de cohérence du texte"""
-        if not text.strip():
+        if not text or text.isspace():
             return 0.0
         
         score = 0.8  # Score de base
         
-        # Pénalité pour trop de caractères spéciaux
-        special_chars = sum(1 for c in text if not c.isalnum() and c not in ' .,!?;:\n-()[]{}')
-        if len(text) > 0:
-            special_ratio = special_chars / len(text)
-            if special_ratio > 0.3:
-                score -= 0.3
+        # Texte très court (ligne TrOCR isolée): trop peu de caractères pour
+        # que les ajustements soient significatifs
+        if len(text) < _COHERENCE_MIN_LENGTH:
+            return score
+        
+        # Pénalité pour trop de caractères spéciaux (boucle en C via translate;
+        # seuls les caractères non ASCII restants passent par isalnum)
+        remaining = text.translate(_COHERENCE_DELETE)
+        if remaining.isascii():
+            special_chars = len(remaining)
+        else:
+            special_chars = sum(1 for c in remaining if not c.isalnum())
+        if special_chars / len(text) > 0.3:
+            score -= 0.3
         
         # Bonus pour la présence de mots cohérents
         words = text.split()
         if words:
             # Mots de longueur raisonnable
-            reasonable_words = sum(1 for word in words if 2 <= len(word) <= 15)
-            if len(words) > 0:
-                reasonable_ratio = reasonable_words / len(words)
-                score += (reasonable_ratio - 0.5) * 0.2  # Bonus si >50% de mots raisonnables
+            word_lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+            reasonable_words = int(np.count_nonzero((word_lengths >= 2) & (word_lengths <= 15)))
+            reasonable_ratio = reasonable_words / len(words)
+            score += (reasonable_ratio - 0.5) * 0.2  # Bonus si >50% de mots raisonnables
         
         return max(0.0, min(1.0, score))
     
     def _combine_results(self, results: List[Tuple[str, OCRResult]]) -> OCRResult:
-        """Combine plusieurs résultats OCR"""
+        """
+        Combine plusieurs résultats OCR par vote pondéré mot à mot
+        
+        Le résultat de meilleure confiance sert de maître. Pour chaque mot du
+        maître, les mots des autres moteurs dont la bbox recouvre la sienne
+        (IoU >= ENSEMBLE_IOU_THRESHOLD) votent avec leur confiance; le texte
+        le plus soutenu l'emporte. Sans bboxes exploitables (ex: TrOCR), le
+        résultat maître est conservé tel quel.
+        """
         if len(results) == 1:
             return results[0][1]
         
-        # Pour l'instant, sélectionner le résultat avec la meilleure confiance
-        # TODO: Implémenter une vraie logique d'ensemble
         best_engine, best_result = max(results, key=lambda x: x[1].confidence)
+        others = [result for _, result in results if result is not best_result and result.bbox_data]
         
-        # Ajouter des métadonnées sur la combinaison
+        # Ajouter des métadonnées sur la combinaison (confiances avant vote)
         best_result.quality_metrics["ensemble_engines"] = [engine for engine, _ in results]
         best_result.quality_metrics["ensemble_confidences"] = {
             engine: result.confidence for engine, result in results
         }
         best_result.quality_metrics["selected_engine"] = best_engine
         
+        replaced_words = 0
+        if best_result.bbox_data and others:
+            replaced_words = self._vote_words(best_result, others)
+        
+        best_result.quality_metrics["ensemble_replaced_words"] = replaced_words
+        
         return best_result
     
+    @staticmethod
+    def _corner_boxes(xywh: np.ndarray) -> np.ndarray:
+        """Boîtes (x, y, w, h) -> (x1, y1, x2, y2), en float64 pour les aires"""
+        boxes = xywh.astype(np.float64)
+        boxes[:, 2:] += boxes[:, :2]
+        return boxes
+    
+    @staticmethod
+    def _iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+        """IoU entre chaque boîte de boxes_a (N) et de boxes_b (M) -> matrice N x M"""
+        top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+        bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+        inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+        area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+        area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+        union = area_a[:, None] + area_b[None, :] - inter
+        return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    
+    def _vote_words(self, master: OCRResult, others: List[OCRResult]) -> int:
+        """
+        Vote pondéré par la confiance sur les mots du résultat maître
+        
+        Met à jour le texte, les bboxes et la confiance du maître; retourne
+        le nombre de mots remplacés.
+        """
+        master_xywh, master_conf, master_texts = master.to_soa()
+        master_boxes = self._corner_boxes(master_xywh)
+        votes = [Counter({text: conf}) for text, conf in zip(master_texts, master_conf.tolist())]
+        supporters = [Counter({text: 1}) for text in master_texts]
+        
+        for other in others:
+            other_xywh, other_conf, other_texts = other.to_soa()
+            overlaps = self._iou_matrix(master_boxes, self._corner_boxes(other_xywh)) >= ENSEMBLE_IOU_THRESHOLD
+            other_conf = other_conf.tolist()
+            for i, j in zip(*np.nonzero(overlaps)):
+                votes[i][other_texts[j]] += other_conf[j]
+                supporters[i][other_texts[j]] += 1
+        
+        replaced_words = 0
+        chosen_confidences = []
+        for word, word_votes, word_supporters in zip(master.bbox_data, votes, supporters):
+            # max() garde le premier en cas d'égalité: le mot du maître
+            winner = max(word_votes, key=word_votes.get)
+            chosen_confidences.append(word_votes[winner] / word_supporters[winner])
+            if winner != word["text"]:
+                word["text"] = winner
+                replaced_words += 1
+        
+        master.confidence = float(np.mean(chosen_confidences)) / 100.0
+        
+        if replaced_words:
+            # Recomposer le texte: un retour en arrière horizontal marque une nouvelle ligne
+            lines = [[]]
+            previous_left = None
+            for word in master.bbox_data:
+                if previous_left is not None and word["left"] < previous_left:
+                    lines.append([])
+                lines[-1].append(word["text"])
+                previous_left = word["left"]
+            master.text = "\n".join(" ".join(line) for line in lines)
+            master.word_count = len(master.text.split())
+            master.line_count = len(lines)
+        
+        return replaced_words
+    
+    def _increment_stat(self, key: str, amount: int = 1):
+        """Incrémente un compteur de statistiques (thread-safe)"""
+        with self._stats_lock:
+            setattr(self._stats, key, getattr(self._stats, key) + amount)
+    
     def _update_stats(self, result: OCRResult, processing_time: float):
         """Met à jour les statistiques globales"""
-        self.stats["total_processed"] += 1
-        
-        # Moyenne mobile du temps de traitement
-        n = self.stats["total_processed"]
-        self.stats["avg_processing_time"] = (
-            (self.stats["avg_processing_time"] * (n - 1) + processing_time) / n
-        )
+        # Taux de succès (texte non vide, sans copie strip())
+        text = result.text
+        success = 1.0 if (text and not text.isspace() and result.confidence > 0.1) else 0.0
         
-        # Taux de succès
-        success = len(result.text.strip()) > 0 and result.confidence > 0.1
-        current_success_rate = self.stats["success_rate"]
-        self.stats["success_rate"] = ((current_success_rate * (n - 1) + (1.0 if success else 0.0)) / n)
+        with self._stats_lock:
+            stats = self._stats
+            stats.total_processed += 1
+            
+            # Moyenne mobile du temps de traitement (mise à jour incrémentale)
+            n = stats.total_processed
+            stats.avg_processing_time += (processing_time - stats.avg_processing_time) / n
+            stats.success_rate += (success - stats.success_rate) / n
     
     def get_stats(self) -> Dict[str, Any]:
         """Retourne les statistiques du moteur hybride"""
-        stats = self.stats.copy()
+        stats = self.stats
         
         # Ajouter les statistiques de cache si disponible
         if self.cache_manager:
@@ -582,23 +1277,23 @@ class HybridOCREngine:
     
     def _cleanup_trocr(self):
         """Callback de nettoyage pour TrOCR"""
-        if hasattr(self, 'trocr_engine') and self.trocr_engine:
+        if getattr(self, '_trocr_engine', None):
             try:
-                # Libérer les ressources TrOCR
-                if hasattr(self.trocr_engine, 'model') and self.trocr_engine.model:
-                    self.trocr_engine.model = None
-                if hasattr(self.trocr_engine, 'processor') and self.trocr_engine.processor:
-                    self.trocr_engine.processor = None
-                self.trocr_engine = None
+                # Libérer les ressources TrOCR (rechargé au prochain usage)
+                if hasattr(self._trocr_engine, 'model') and self._trocr_engine.model:
+                    self._trocr_engine.model = None
+                if hasattr(self._trocr_engine, 'processor') and self._trocr_engine.processor:
+                    self._trocr_engine.processor = None
+                self._trocr_engine = None
                 logger.info("🧹 TrOCR engine libéré")
             except Exception as e:
                 logger.warning(f"Erreur nettoyage TrOCR: {e}")
     
     def _cleanup_tesseract(self):
         """Callback de nettoyage pour Tesseract"""
-        if hasattr(self, 'tesseract_engine') and self.tesseract_engine:
+        if getattr(self, '_tesseract_engine', None):
             try:
-                self.tesseract_engine = None
+                self._tesseract_engine = None
                 logger.info("🧹 Tesseract engine libéré")
             except Exception as e:
                 logger.warning(f"Erreur nettoyage Tesseract: {e}")
@@ -626,9 +1321,11 @@ class HybridOCREngine:
     def __del__(self):
         """Destructeur avec nettoyage automatique"""
         try:
+            if hasattr(self, '_executor'):
+                self._executor.shutdown(wait=False)
             if hasattr(self, '_memory_optimizer'):
                 self._memory_optimizer.stop_monitoring()
-                if hasattr(self, 'trocr_engine') or hasattr(self, 'tesseract_engine'):
+                if getattr(self, '_trocr_engine', None) or getattr(self, '_tesseract_engine', None):
                     self._memory_optimizer.cleanup_memory(aggressive=True)
         except:
             pass
@@ -636,18 +1333,19 @@ class HybridOCREngine:
     def get_engine_info(self) -> Dict[str, Any]:
         """Retourne les informations sur les moteurs disponibles"""
         info = {
-            "strategy": str(self.config.strategy),
+            "strategy": self._strategy_label,
             "preprocessing_enabled": self.config.preprocess_images,
             "engines": {}
         }
         
-        if self.trocr_engine:
-            info["engines"]["trocr"] = self.trocr_engine.get_model_info()
+        # Seuls les moteurs déjà chargés sont décrits (pas de chargement ici)
+        if self._trocr_engine:
+            info["engines"]["trocr"] = self._trocr_engine.get_model_info()
         
-        if self.tesseract_engine:
+        if self._tesseract_engine:
             info["engines"]["tesseract"] = {
-                "default_language": self.tesseract_engine.default_lang,
-                "supported_languages": list(self.tesseract_engine.supported_languages)
+                "default_language": self._tesseract_engine.default_lang,
+                "supported_languages": list(self._tesseract_engine.supported_languages)
             }
         
         return info
@@ -658,33 +1356,56 @@ class HybridOCREngine:
         
         results = []
         strategy_stats = {strategy: 0 for strategy in OCRStrategy}
+        valid_strategy_values = {strategy.value for strategy in OCRStrategy}
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        for image_path in test_images:
-            try:
-                result = self.extract_text(image_path)
-                results.append(result)
-                
-                # Compter les stratégies utilisées
-                strategy_used = result.quality_metrics.get("strategy_used", "unknown")
-                if strategy_used in [s.value for s in OCRStrategy]:
-                    strategy_stats[OCRStrategy(strategy_used)] += 1
-                    
-            except Exception as e:
-                logger.error(f"Erreur benchmark sur {image_path}: {e}")
-        
-        total_time = time.time() - start_time
+        if self.config.strategy in (OCRStrategy.TROCR_ONLY, OCRStrategy.TESSERACT_ONLY, OCRStrategy.TROCR_FALLBACK):
+            # Lots: TrOCR batché sur GPU, Tesseract parallélisé par extract_text_batch
+            for i in range(0, len(test_images), self.config.batch_size):
+                batch = test_images[i:i + self.config.batch_size]
+                try:
+                    results.extend(self.extract_text_batch(batch))
+                except Exception as e:
+                    logger.error(f"Erreur benchmark sur le lot {batch}: {e}")
+        else:
+            # Stratégies multi-moteurs: une image par worker, chacun avec ses
+            # workers moteurs (le pool partagé n'en a que ENGINE_POOL_WORKERS)
+            workers = os.cpu_count() or 1
+            
+            def extract(image_path):
+                self._thread_executor.executor = engine_executor
+                try:
+                    return self.extract_text(image_path)
+                finally:
+                    del self._thread_executor.executor
+            
+            with ThreadPoolExecutor(max_workers=workers * ENGINE_POOL_WORKERS, thread_name_prefix="ocr_benchmark_engine") as engine_executor, \
+                 ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr_benchmark") as executor:
+                futures = {executor.submit(extract, image_path): image_path for image_path in test_images}
+                for future in as_completed(futures):
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        logger.error(f"Erreur benchmark sur {futures[future]}: {e}")
+        
+        for result in results:
+            # Compter les stratégies utilisées
+            strategy_used = result.quality_metrics.get("strategy_used", "unknown")
+            if strategy_used in valid_strategy_values:
+                strategy_stats[OCRStrategy(strategy_used)] += 1
+        
+        total_time = time.perf_counter() - start_time
         
         benchmark_stats = {
             "hybrid_ocr_benchmark": True,
-            "strategy_configured": str(self.config.strategy),
+            "strategy_configured": self._strategy_label,
             "total_images": len(test_images),
             "successful_extractions": len(results),
             "total_benchmark_time": total_time,
             "avg_confidence": sum(r.confidence for r in results) / len(results) if results else 0.0,
             "total_words": sum(r.word_count for r in results),
-            "strategy_usage": {str(k): v for k, v in strategy_stats.items()},
+            "strategy_usage": {k.value: v for k, v in strategy_stats.items()},
             "global_stats": self.get_stats(),
             "throughput": len(results) / total_time if total_time > 0 else 0.0
         }
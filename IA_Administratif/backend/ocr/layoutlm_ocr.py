@@ -3,10 +3,16 @@ Module OCR avec compréhension de structure utilisant LayoutLMv3
 Analyse la structure des documents pour une extraction plus précise
 """
 
+import contextlib
 import logging
+import os
+import tempfile
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Union, Optional, List, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 
@@ -14,15 +20,50 @@ import torch
 import numpy as np
 from PIL import Image, ImageDraw
 import cv2
-from transformers import LayoutLMv3Processor, LayoutLMv3ForTokenClassification
+from transformers import LayoutLMv3Config, LayoutLMv3Processor, LayoutLMv3ForTokenClassification
 import pytesseract
 
+# Libération de la mémoire GPU des poids sans les déplacer (optionnel, CUDA Linux):
+# les adresses sont conservées, les CUDA Graphs capturés restent valides, et le
+# contenu des poids est restauré depuis une copie en mémoire centrale à la reprise
+try:
+    from torch_memory_saver import torch_memory_saver
+    TORCH_MEMORY_SAVER_AVAILABLE = True
+except ImportError:
+    TORCH_MEMORY_SAVER_AVAILABLE = False
+
+# Backend ONNX Runtime (optionnel): export via optimum, exécution par onnxruntime
+try:
+    import onnxruntime as ort
+    from optimum.exporters.onnx import main_export
+    OPTIMUM_AVAILABLE = True
+except ImportError:
+    OPTIMUM_AVAILABLE = False
+
 # Import des modules locaux
 from .tesseract_ocr import OCRResult, TextBlock
 from .image_preprocessor import ImagePreprocessor
 
 logger = logging.getLogger(__name__)
 
+# Précisions de calcul disponibles pour le modèle
+PRECISION_DTYPES = {
+    "fp32": torch.float32,
+    "fp16": torch.float16,
+    "bf16": torch.bfloat16,
+}
+
+# Granularité des longueurs de séquence capturées en CUDA Graph (un graphe par palier)
+SEQUENCE_BUCKET = 64
+
+# Nombre maximal de CUDA Graphs conservés (formes les moins récemment utilisées évincées)
+MAX_CUDA_GRAPHS = 8
+
+# Part maximale de pixels intermédiaires (ni encre ni papier, estimée sur 1
+# pixel sur CLEAN_SCAN_SAMPLE_STEP) d'une page considérée comme déjà binarisée
+CLEAN_SCAN_MAX_MIDTONES = 0.01
+CLEAN_SCAN_SAMPLE_STEP = 101
+
 
 class DocumentRegion(Enum):
     """Types de régions dans un document"""
@@ -58,6 +99,21 @@ class LayoutLMConfig:
     use_gpu: bool = True
     confidence_threshold: float = 0.7
     cache_dir: Optional[str] = None
+    precision: str = "auto"  # auto (fp16 sur GPU, fp32 sur CPU), fp32, fp16, bf16
+    quantization: str = "none"  # none | int8 (Linear dynamiques, CPU uniquement)
+    use_cuda_graph: bool = True  # Rejoue le forward capturé (CUDA uniquement)
+    batch_size: int = 4  # Pages par forward (extract_structured_text_batch)
+    compile_model: bool = False  # torch.compile du forward (compilation au premier appel par forme)
+    backend: str = "pytorch"  # pytorch | onnx (ONNX Runtime, CUDA/CoreML/CPU)
+    
+    def __post_init__(self):
+        """Valide la précision, la quantification et le backend demandés"""
+        if self.precision != "auto" and self.precision not in PRECISION_DTYPES:
+            raise ValueError(f"Précision LayoutLM inconnue: {self.precision} (disponibles: auto, fp32, fp16, bf16)")
+        if self.quantization not in ("none", "int8"):
+            raise ValueError(f"Quantification LayoutLM inconnue: {self.quantization} (disponibles: none, int8)")
+        if self.backend not in ("pytorch", "onnx"):
+            raise ValueError(f"Backend LayoutLM inconnu: {self.backend} (disponibles: pytorch, onnx)")
 
 
 class LayoutLMEngine:
@@ -65,6 +121,28 @@ class LayoutLMEngine:
     Moteur OCR avec compréhension de structure basé sur LayoutLMv3
     """
     
+    # Type d'entité -> liste des entités détectées (autres types: "others")
+    _ENTITY_BUCKETS = {
+        "header": "headers",
+        "title": "titles",
+        "date": "dates",
+        "amount": "amounts",
+        "address": "addresses",
+        "company": "companies",
+        "other": "others"
+    }
+    
+    # Type d'entité -> type de région (autres types: OTHER)
+    _ENTITY_REGIONS = {
+        "header": DocumentRegion.HEADER,
+        "title": DocumentRegion.TITLE,
+        "date": DocumentRegion.PARAGRAPH,
+        "amount": DocumentRegion.PARAGRAPH,
+        "address": DocumentRegion.PARAGRAPH,
+        "company": DocumentRegion.PARAGRAPH,
+        "other": DocumentRegion.OTHER
+    }
+    
     def __init__(self, config: Optional[LayoutLMConfig] = None):
         """
         Initialise le moteur LayoutLM
@@ -75,8 +153,38 @@ class LayoutLMEngine:
         self.config = config or LayoutLMConfig()
         self.processor = None
         self.model = None
+        self.session = None  # Session ONNX Runtime (backend onnx)
+        self._onnx_inputs: List[str] = []
         self.device = None
-        self.preprocessor = ImagePreprocessor()
+        self.dtype = torch.float32
+        # Prétraitement directement en RGB (ordre PIL): pas d'inversion des canaux
+        self.preprocessor = ImagePreprocessor(channel_order="RGB")
+        
+        # CUDA Graphs capturés par forme d'entrée: (graphe, entrées statiques, logits),
+        # dans l'ordre d'utilisation. Un seul pool mémoire partagé par toutes les
+        # captures: les replays sont sérialisés par _graph_lock et les logits
+        # copiés aussitôt, un graphe ne lit jamais la mémoire de travail d'un autre
+        self._cuda_graph_enabled = False
+        self._cuda_graphs: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+        self._graph_pool = None
+        self._graph_lock = threading.Lock()
+        
+        # Modèle non compilé, conservé pour repli si torch.compile échoue
+        self._eager_model = None
+        
+        # Mémoire GPU des poids libérable entre deux lots (release_gpu_memory)
+        self._memory_saver = False
+        self._memory_tag = f"layoutlm_{id(self)}"
+        self._gpu_released = False
+        # Moteur partagé entre threads: la libération attend la fin des forwards
+        # en cours et bloque les suivants jusqu'à ce qu'elle soit terminée
+        self._gpu_state = threading.Condition()
+        self._forwards_in_flight = 0
+        
+        # Tables indexées par id de classe pour les boucles par token (voir _build_label_tables)
+        self._label_prefix: List[str] = []
+        self._label_bucket: List[Optional[str]] = []
+        self._label_region: List[Optional[DocumentRegion]] = []
         
         # Labels de classification de tokens (exemple pour documents d'affaires)
         self.token_labels = {
@@ -125,6 +233,11 @@ class LayoutLMEngine:
                 cache_dir=self.config.cache_dir
             )
             
+            if self.config.backend == "onnx":
+                self._load_onnx_session()
+                logger.info(f"LayoutLMv3 initialisé avec succès (ONNX Runtime, {self.session.get_providers()[0]})")
+                return
+            
             # Chargement du modèle
             logger.info("Chargement du modèle LayoutLMv3...")
             self.model = LayoutLMv3ForTokenClassification.from_pretrained(
@@ -132,32 +245,331 @@ class LayoutLMEngine:
                 cache_dir=self.config.cache_dir
             )
             
-            self.model.to(self.device)
+            self._build_label_tables(self.model.config.num_labels)
+            
+            # Poids en demi-précision sur GPU: moitié moins de mémoire à lire
+            # et matmuls sur les unités fp16. Sur CPU, bf16 n'est plus rapide
+            # qu'avec un support natif (AVX512-BF16, AMX): à demander explicitement
+            self.dtype = self._resolve_dtype()
+            with self._memory_saver_region():
+                self.model.to(self.device, dtype=self.dtype)
             self.model.eval()
+            self._quantize_model()
+            self._cuda_graph_enabled = self.config.use_cuda_graph and self.device.type == "cuda"
+            self._compile_model()
             
-            logger.info(f"LayoutLMv3 initialisé avec succès sur {self.device}")
+            logger.info(f"LayoutLMv3 initialisé avec succès sur {self.device} ({self.dtype})")
             
         except Exception as e:
             logger.error(f"Erreur initialisation LayoutLMv3: {str(e)}")
             raise RuntimeError(f"Impossible d'initialiser LayoutLMv3: {str(e)}")
     
+    def _load_onnx_session(self):
+        """
+        Charge LayoutLMv3 avec ONNX Runtime: graphe figé et optimisé (fusion
+        des opérateurs), sans le dispatch PyTorch ni l'autograd.
+        
+        Le modèle est exporté une seule fois sous cache_dir/onnx. Provider
+        selon le device: CUDA, CoreML sur Apple Silicon s'il est disponible
+        dans onnxruntime, CPU sinon. Les entrées restent en mémoire centrale
+        et en fp32: les options precision, quantization, use_cuda_graph et
+        compile_model ne s'appliquent qu'au backend pytorch
+        """
+        if not OPTIMUM_AVAILABLE:
+            raise RuntimeError("Backend ONNX demandé mais optimum[onnxruntime] n'est pas installé")
+        
+        available = ort.get_available_providers()
+        if self.device.type == "cuda" and "CUDAExecutionProvider" in available:
+            providers = ["CUDAExecutionProvider", "CPUExecutionProvider"]
+        elif self.device.type == "mps" and "CoreMLExecutionProvider" in available:
+            providers = ["CoreMLExecutionProvider", "CPUExecutionProvider"]
+        else:
+            if self.device.type != "cpu":
+                logger.info(f"Backend ONNX: pas de provider pour {self.device}, utilisation du CPU")
+            providers = ["CPUExecutionProvider"]
+        self.device = torch.device("cpu")
+        
+        export_dir = Path(self.config.cache_dir or tempfile.gettempdir()) / "onnx" / Path(self.config.model_name).name
+        model_path = export_dir / "model.onnx"
+        if not model_path.exists():
+            logger.info(f"Export ONNX de LayoutLMv3 vers {export_dir} (une seule fois)...")
+            main_export(
+                self.config.model_name,
+                output=export_dir,
+                task="token-classification",
+                cache_dir=self.config.cache_dir
+            )
+        
+        model_config = LayoutLMv3Config.from_pretrained(self.config.model_name, cache_dir=self.config.cache_dir)
+        self._build_label_tables(model_config.num_labels)
+        
+        self.session = ort.InferenceSession(str(model_path), providers=providers)
+        self._onnx_inputs = [model_input.name for model_input in self.session.get_inputs()]
+    
+    def _build_label_tables(self, num_labels: int):
+        """
+        Préfixe ("B-", "I-" ou ""), liste d'entités et type de région de
+        chaque classe, indexés par id: une lecture de liste par token au lieu
+        de dict.get, startswith et de la correspondance des types d'entité.
+        Les ids sans libellé connu valent "O"
+        """
+        labels = [self.token_labels.get(pred_id, "O") for pred_id in range(max(num_labels, len(self.token_labels)))]
+        self._label_prefix = [label[:2] if label[:2] in ("B-", "I-") else "" for label in labels]
+        entity_types = [label[2:].lower() if prefix else None for label, prefix in zip(labels, self._label_prefix)]
+        self._label_bucket = [
+            self._ENTITY_BUCKETS.get(entity_type, "others") if entity_type else None
+            for entity_type in entity_types
+        ]
+        self._label_region = [
+            self._map_entity_to_region(entity_type) if entity_type else None
+            for entity_type in entity_types
+        ]
+    
+    def _resolve_dtype(self) -> torch.dtype:
+        """Type des poids selon la précision configurée et le device"""
+        if self._use_int8():
+            # quantize_dynamic part de poids fp32
+            if self.config.precision not in ("auto", "fp32"):
+                logger.warning(f"Précision {self.config.precision} ignorée: quantification int8 active")
+            return torch.float32
+        if self.config.precision != "auto":
+            return PRECISION_DTYPES[self.config.precision]
+        if self.device.type in ("cuda", "mps"):
+            return torch.float16
+        return torch.float32
+    
+    def _use_int8(self) -> bool:
+        """La quantification dynamique int8 ne s'exécute que sur CPU"""
+        if self.config.quantization != "int8":
+            return False
+        if self.device.type != "cpu":
+            logger.warning(f"Quantification int8 ignorée sur {self.device} (CPU uniquement)")
+            return False
+        return True
+    
+    def _quantize_model(self):
+        """
+        Quantification dynamique int8 des couches Linear de l'encodeur (poids
+        int8, activations quantifiées à la volée): l'essentiel du forward.
+        Les biais de position relative sont des Linear dont le poids est lu
+        directement par le modèle, ils restent en fp32
+        """
+        if self.dtype != torch.float32 or not self._use_int8():
+            return
+        
+        torch.ao.quantization.quantize_dynamic(
+            self.model.layoutlmv3.encoder.layer, {torch.nn.Linear},
+            dtype=torch.qint8, inplace=True
+        )
+        logger.info("LayoutLMv3 quantifié en int8 (Linear dynamiques)")
+    
+    def _memory_saver_region(self):
+        """
+        Région torch_memory_saver où placer les poids (CUDA), avec copie en
+        mémoire centrale: pause() rend les pages physiques et resume() en
+        remappe de nouvelles aux mêmes adresses, sans leur ancien contenu.
+        Sans sauvegarde CPU possible (ancienne version), les poids restent
+        hors région et release_gpu_memory les transfère en mémoire centrale
+        """
+        if not TORCH_MEMORY_SAVER_AVAILABLE or self.device.type != "cuda":
+            return contextlib.nullcontext()
+        
+        try:
+            region = torch_memory_saver.region(tag=self._memory_tag, enable_cpu_backup=True)
+        except TypeError:
+            logger.info("torch_memory_saver sans sauvegarde CPU: libération GPU par transfert en mémoire centrale")
+            return contextlib.nullcontext()
+        
+        self._memory_saver = True
+        return region
+    
+    def release_gpu_memory(self):
+        """
+        Libère la mémoire GPU occupée par le modèle, entre deux lots, pour
+        d'autres traitements (LLM, autres workers). Le modèle est rechargé
+        sur le GPU par resume_gpu_memory ou automatiquement au prochain appel.
+        
+        Avec torch_memory_saver, la mémoire des poids est rendue sans changer
+        leurs adresses (contenu sauvegardé en mémoire centrale et restauré à
+        la reprise); sinon le modèle passe en mémoire centrale et les CUDA
+        Graphs, liés aux adresses des poids, sont abandonnés.
+        
+        Attend la fin des forwards en cours sur les autres threads.
+        """
+        if self.device.type == "cpu":
+            return
+        
+        with self._gpu_state:
+            self._gpu_state.wait_for(lambda: not self._forwards_in_flight)
+            if self._gpu_released:
+                return
+            
+            if self._memory_saver:
+                torch.cuda.synchronize()
+                torch_memory_saver.pause(self._memory_tag)
+            else:
+                self.model.to("cpu")
+                self._cuda_graphs.clear()
+                self._graph_pool = None
+                self._empty_device_cache()
+            
+            self._gpu_released = True
+            logger.info(f"Mémoire {self.device} du modèle LayoutLMv3 libérée")
+    
+    def resume_gpu_memory(self):
+        """Recharge sur le GPU le modèle libéré par release_gpu_memory"""
+        with self._gpu_state:
+            if not self._gpu_released:
+                return
+            
+            if self._memory_saver:
+                torch_memory_saver.resume(self._memory_tag)
+            else:
+                self.model.to(self.device)
+            
+            self._gpu_released = False
+            logger.info(f"Modèle LayoutLMv3 rechargé sur {self.device}")
+    
+    def _empty_device_cache(self):
+        """Rend au système la mémoire libre conservée par l'allocateur PyTorch"""
+        if self.device.type == "cuda":
+            torch.cuda.empty_cache()
+        elif self.device.type == "mps":
+            torch.mps.empty_cache()
+    
+    def _compile_model(self):
+        """
+        Compile le forward avec torch.compile (fusion des kernels, plus de
+        dispatch Python). Sur CUDA, le mode reduce-overhead gère lui-même
+        les CUDA Graphs et remplace la capture manuelle
+        """
+        if not self.config.compile_model:
+            return
+        if not hasattr(torch, "compile"):
+            logger.warning("torch.compile indisponible (PyTorch < 2.0), forward non compilé")
+            return
+        
+        mode = "reduce-overhead" if self.device.type == "cuda" else "default"
+        self._eager_model = self.model
+        self.model = torch.compile(self.model, mode=mode, dynamic=False)
+        self._cuda_graph_enabled = False
+        logger.info(f"Forward LayoutLMv3 compilé (mode {mode})")
+    
+    def _pad_to_bucket(self) -> bool:
+        """Formes d'entrée arrondies au palier (une capture ou compilation par forme)"""
+        return self._cuda_graph_enabled or self._eager_model is not None
+    
+    def _forward(self, encoding: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """
+        Forward du modèle, retourne les logits. Sur CUDA, le forward est
+        capturé une fois par forme d'entrée puis rejoué: les centaines de
+        petits kernels sont lancés en un seul appel
+        """
+        if self.session is not None:
+            # Sortie numpy reprise sans copie par torch pour le post-traitement
+            feed = {name: encoding[name].numpy() for name in self._onnx_inputs}
+            return torch.from_numpy(self.session.run(["logits"], feed)[0])
+        
+        with self._gpu_state:
+            if self._gpu_released:
+                self.resume_gpu_memory()
+            self._forwards_in_flight += 1
+        try:
+            return self._forward_on_device(encoding)
+        finally:
+            with self._gpu_state:
+                self._forwards_in_flight -= 1
+                if not self._forwards_in_flight:
+                    self._gpu_state.notify_all()
+    
+    def _forward_on_device(self, encoding: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """Forward PyTorch (classique, compilé ou CUDA Graph), modèle chargé sur self.device"""
+        if not self._cuda_graph_enabled:
+            if self._eager_model is None:
+                return self.model(**encoding).logits
+            try:
+                return self.model(**encoding).logits
+            except Exception as e:
+                # La compilation n'a lieu qu'au premier appel: repli définitif
+                logger.warning(f"Forward compilé en échec, retour au forward classique: {str(e)}")
+                self.model = self._eager_model
+                self._eager_model = None
+                return self.model(**encoding).logits
+        
+        key = tuple(sorted((name, tuple(tensor.shape)) for name, tensor in encoding.items()))
+        with self._graph_lock:
+            entry = self._cuda_graphs.get(key)
+            if entry is None:
+                try:
+                    entry = self._capture_cuda_graph(encoding)
+                except Exception as e:
+                    logger.warning(f"Capture CUDA Graph impossible, forward classique: {str(e)}")
+                    self._cuda_graph_enabled = False
+                    self._cuda_graphs.clear()
+                    self._graph_pool = None
+                    return self.model(**encoding).logits
+                self._cuda_graphs[key] = entry
+                if len(self._cuda_graphs) > MAX_CUDA_GRAPHS:
+                    self._cuda_graphs.popitem(last=False)
+            else:
+                self._cuda_graphs.move_to_end(key)
+            
+            graph, static_inputs, static_logits = entry
+            for name, tensor in encoding.items():
+                static_inputs[name].copy_(tensor)
+            graph.replay()
+            # Copie: les logits statiques sont réécrits au prochain replay
+            return static_logits.clone()
+    
+    def _capture_cuda_graph(self, encoding: Dict[str, torch.Tensor]) -> Tuple:
+        """Capture le forward sur des entrées statiques de la forme donnée"""
+        static_inputs = {name: tensor.clone() for name, tensor in encoding.items()}
+        
+        # Warmup sur un stream annexe (allocations et choix des kernels cuBLAS)
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            for _ in range(2):
+                self.model(**static_inputs)
+        torch.cuda.current_stream().wait_stream(stream)
+        
+        if self._graph_pool is None:
+            self._graph_pool = torch.cuda.graph_pool_handle()
+        
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph, pool=self._graph_pool):
+            static_logits = self.model(**static_inputs).logits
+        
+        logger.info(f"CUDA Graph LayoutLMv3 capturé pour input_ids {tuple(encoding['input_ids'].shape)}")
+        return graph, static_inputs, static_logits
+    
     def _convert_to_pil(self, image_input: Union[str, Path, np.ndarray, Image.Image]) -> Image.Image:
-        """Convertit l'image vers PIL Image"""
+        """Convertit l'image vers PIL Image RGB (sans copie si elle l'est déjà)"""
         if isinstance(image_input, (str, Path)):
-            return Image.open(image_input).convert('RGB')
+            # Décodage unique, fichier refermé aussitôt
+            with Image.open(image_input) as pil_image:
+                pil_image.load()
+            return pil_image if pil_image.mode == 'RGB' else pil_image.convert('RGB')
         elif isinstance(image_input, np.ndarray):
-            if len(image_input.shape) == 3:
+            # Tableau OpenCV (niveaux de gris, BGR ou BGRA): une seule conversion vers RGB
+            if image_input.ndim == 2:
+                image_input = cv2.cvtColor(image_input, cv2.COLOR_GRAY2RGB)
+            elif image_input.shape[2] == 4:
+                image_input = cv2.cvtColor(image_input, cv2.COLOR_BGRA2RGB)
+            else:
                 image_input = cv2.cvtColor(image_input, cv2.COLOR_BGR2RGB)
-            return Image.fromarray(image_input).convert('RGB')
+            return Image.fromarray(image_input)
         elif isinstance(image_input, Image.Image):
-            return image_input.convert('RGB')
+            # convert() copie les pixels même sans changement de mode
+            return image_input if image_input.mode == 'RGB' else image_input.convert('RGB')
         else:
             raise ValueError(f"Format image non supporté: {type(image_input)}")
     
     def extract_structured_text(
         self,
         image: Union[str, Path, np.ndarray, Image.Image],
-        preprocess: bool = True
+        preprocess: bool = True,
+        force_preprocess: bool = False
     ) -> Tuple[OCRResult, List[StructuredRegion]]:
         """
         Extrait le texte avec analyse de structure
@@ -165,6 +577,8 @@ class LayoutLMEngine:
         Args:
             image: Image à analyser
             preprocess: Appliquer le prétraitement
+            force_preprocess: Prétraitement complet même pour une page déjà
+                binarisée (sinon limité à la rotation et aux bordures)
             
         Returns:
             Tuple (résultat OCR global, régions structurées)
@@ -172,54 +586,7 @@ class LayoutLMEngine:
         start_time = time.time()
         
         try:
-            # Conversion vers PIL
-            pil_image = self._convert_to_pil(image)
-            logger.info(f"Analyse structurée LayoutLM, taille: {pil_image.size}")
-            
-            # Prétraitement si demandé
-            if preprocess:
-                np_image = np.array(pil_image)
-                if len(np_image.shape) == 3:
-                    np_image = cv2.cvtColor(np_image, cv2.COLOR_RGB2BGR)
-                
-                processed_image = self.preprocessor.process_image_array(np_image)
-                
-                if len(processed_image.shape) == 3:
-                    processed_image = cv2.cvtColor(processed_image, cv2.COLOR_BGR2RGB)
-                pil_image = Image.fromarray(processed_image)
-            
-            # Extraction OCR basique avec Tesseract pour obtenir les mots et positions
-            logger.debug("Extraction OCR basique pour les positions...")
-            ocr_data = pytesseract.image_to_data(
-                pil_image, 
-                output_type=pytesseract.Output.DICT,
-                lang='fra+eng'
-            )
-            
-            # Construction des tokens et bounding boxes
-            words = []
-            boxes = []
-            
-            for i in range(len(ocr_data['text'])):
-                word = ocr_data['text'][i].strip()
-                if word and int(ocr_data['conf'][i]) > 30:  # Confiance minimum
-                    words.append(word)
-                    
-                    # Bounding box normalisée (format LayoutLM)
-                    x = ocr_data['left'][i]
-                    y = ocr_data['top'][i]
-                    w = ocr_data['width'][i]
-                    h = ocr_data['height'][i]
-                    
-                    # Normalisation par rapport à la taille de l'image
-                    img_width, img_height = pil_image.size
-                    norm_box = [
-                        int(1000 * x / img_width),
-                        int(1000 * y / img_height),
-                        int(1000 * (x + w) / img_width),
-                        int(1000 * (y + h) / img_height)
-                    ]
-                    boxes.append(norm_box)
+            pil_image, words, boxes, preprocessing = self._prepare_page(image, preprocess, force_preprocess)
             
             if not words:
                 logger.warning("Aucun mot détecté par OCR")
@@ -227,250 +594,367 @@ class LayoutLMEngine:
             
             logger.info(f"Mots détectés: {len(words)}")
             
-            # Préparation des inputs pour LayoutLMv3
-            encoding = self.processor(
-                pil_image,
-                words,
-                boxes=boxes,
-                return_tensors="pt",
-                truncation=True,
-                max_length=self.config.max_sequence_length,
-                padding="max_length"
-            )
-            
-            # Déplacement vers le device
-            for key in encoding:
-                if isinstance(encoding[key], torch.Tensor):
-                    encoding[key] = encoding[key].to(self.device)
-            
-            # Prédiction
-            logger.debug("Prédiction LayoutLMv3...")
-            with torch.no_grad():
-                outputs = self.model(**encoding)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                predicted_token_class_ids = predictions.argmax(-1)
-            
-            # Extraction des prédictions
-            token_boxes = encoding['bbox'][0]
-            predicted_tokens = predicted_token_class_ids[0]
-            
-            # Construction du résultat OCR global
-            full_text = " ".join(words)
-            processing_time = time.time() - start_time
+            encoding = self._encode([pil_image], [words], [boxes])
+            predicted_token_class_ids, confidences = self._predict(encoding)
             
-            ocr_result = OCRResult(
-                text=full_text,
-                confidence=float(predictions.max()),
-                language="auto",
-                processing_time=processing_time,
-                word_count=len(words),
-                line_count=len(full_text.split('\n')),
-                bbox_data=[],
-                detected_entities=self._extract_entities_from_predictions(words, predicted_tokens),
-                quality_metrics={
-                    "model_used": "LayoutLMv3",
-                    "model_name": self.config.model_name,
-                    "device": str(self.device),
-                    "preprocessing_applied": preprocess,
-                    "tokens_processed": len(words)
-                }
-            )
-            
-            # Construction des régions structurées
-            structured_regions = self._build_structured_regions(
-                words, boxes, predicted_tokens, pil_image.size
+            ocr_result, structured_regions = self._build_page_result(
+                pil_image, words, boxes, predicted_token_class_ids[0], confidences[0],
+                preprocessing, time.time() - start_time
             )
             
             logger.info(f"LayoutLM terminé: {len(structured_regions)} régions, "
-                       f"temps: {processing_time:.2f}s")
+                       f"temps: {ocr_result.processing_time:.2f}s")
             
             return ocr_result, structured_regions
             
         except Exception as e:
             logger.error(f"Erreur LayoutLM: {str(e)}")
-            processing_time = time.time() - start_time
-            
-            empty_result = OCRResult(
-                text="",
-                confidence=0.0,
-                language="unknown",
-                processing_time=processing_time,
-                word_count=0,
-                line_count=0,
-                bbox_data=[],
-                detected_entities={},
-                quality_metrics={"error": str(e), "model_used": "LayoutLMv3_failed"}
-            )
-            
-            return empty_result, []
-    
-    def _extract_entities_from_predictions(
-        self, 
-        words: List[str], 
-        predictions: torch.Tensor
-    ) -> Dict[str, List[str]]:
-        """Extrait les entités basées sur les prédictions LayoutLM"""
-        entities = {
-            'headers': [],
-            'titles': [],
-            'dates': [],
-            'amounts': [],
-            'addresses': [],
-            'companies': [],
-            'others': []
-        }
+            return self._create_error_result(e, time.time() - start_time)
+    
+    def extract_structured_text_batch(
+        self,
+        images: List[Union[str, Path, np.ndarray, Image.Image]],
+        preprocess: bool = True,
+        force_preprocess: bool = False
+    ) -> List[Tuple[OCRResult, List[StructuredRegion]]]:
+        """
+        Extrait le texte structuré de plusieurs pages: les pages sont
+        tokenisées ensemble et passent par lots de config.batch_size dans
+        un seul forward
         
-        current_entity = None
-        current_tokens = []
+        Args:
+            images: Images à analyser (pages d'un document par exemple)
+            preprocess: Appliquer le prétraitement
+            force_preprocess: Prétraitement complet même pour les pages déjà binarisées
+            
+        Returns:
+            Liste de tuples (résultat OCR global, régions structurées), dans l'ordre des images
+        """
+        results: List[Optional[Tuple[OCRResult, List[StructuredRegion]]]] = [None] * len(images)
         
-        for i, (word, pred_id) in enumerate(zip(words, predictions)):
-            pred_label = self.token_labels.get(int(pred_id), "O")
+        for batch_start in range(0, len(images), self.config.batch_size):
+            batch_indices = range(batch_start, min(batch_start + self.config.batch_size, len(images)))
+            start_time = time.time()
             
-            if pred_label.startswith("B-"):  # Début d'entité
-                # Sauvegarder l'entité précédente si elle existe
-                if current_entity and current_tokens:
-                    entity_text = " ".join(current_tokens)
-                    entities[current_entity].append(entity_text)
+            try:
+                pages = self._prepare_pages(
+                    [images[index] for index in batch_indices], preprocess, force_preprocess
+                )
                 
-                # Commencer une nouvelle entité
-                entity_type = pred_label[2:].lower()
-                if entity_type == "header":
-                    current_entity = "headers"
-                elif entity_type == "title":
-                    current_entity = "titles"
-                elif entity_type == "date":
-                    current_entity = "dates"
-                elif entity_type == "amount":
-                    current_entity = "amounts"
-                elif entity_type == "address":
-                    current_entity = "addresses"
-                elif entity_type == "company":
-                    current_entity = "companies"
-                else:
-                    current_entity = "others"
+                # Les pages sans mot ne passent pas par le modèle
+                filled = [(index, page) for index, page in zip(batch_indices, pages) if page[1]]
+                for index, page in zip(batch_indices, pages):
+                    if not page[1]:
+                        logger.warning(f"Aucun mot détecté par OCR (page {index})")
+                        results[index] = self._create_empty_result(time.time() - start_time)
+                
+                if not filled:
+                    continue
                 
-                current_tokens = [word]
+                encoding = self._encode(
+                    [page[0] for _, page in filled],
+                    [page[1] for _, page in filled],
+                    [page[2] for _, page in filled]
+                )
+                predicted_token_class_ids, confidences = self._predict(encoding)
                 
-            elif pred_label.startswith("I-") and current_entity:  # Continuation d'entité
-                current_tokens.append(word)
+                # Temps moyen par page du lot
+                page_time = (time.time() - start_time) / len(batch_indices)
+                for row, (index, (pil_image, words, boxes, preprocessing)) in enumerate(filled):
+                    results[index] = self._build_page_result(
+                        pil_image, words, boxes, predicted_token_class_ids[row], confidences[row],
+                        preprocessing, page_time
+                    )
                 
-            else:  # O ou changement d'entité
-                # Sauvegarder l'entité précédente
-                if current_entity and current_tokens:
-                    entity_text = " ".join(current_tokens)
-                    entities[current_entity].append(entity_text)
+                logger.info(f"LayoutLM lot de {len(filled)} pages terminé, "
+                           f"temps: {time.time() - start_time:.2f}s")
                 
-                current_entity = None
-                current_tokens = []
+            except Exception as e:
+                logger.error(f"Erreur LayoutLM (lot pages {batch_start}-{batch_indices[-1]}): {str(e)}")
+                page_time = (time.time() - start_time) / len(batch_indices)
+                for index in batch_indices:
+                    results[index] = self._create_error_result(e, page_time)
         
-        # Sauvegarder la dernière entité
-        if current_entity and current_tokens:
-            entity_text = " ".join(current_tokens)
-            entities[current_entity].append(entity_text)
+        return results
+    
+    def _prepare_pages(
+        self,
+        images: List[Union[str, Path, np.ndarray, Image.Image]],
+        preprocess: bool,
+        force_preprocess: bool = False
+    ) -> List[Tuple[Image.Image, List[str], List[List[int]], str]]:
+        """
+        Prépare plusieurs pages en parallèle: Tesseract (mono-thread par appel,
+        lancé en sous-processus) et OpenCV libèrent le GIL, des threads suffisent
+        """
+        if len(images) == 1:
+            return [self._prepare_page(images[0], preprocess, force_preprocess)]
         
-        return entities
+        max_workers = min(len(images), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="layoutlm_tesseract") as executor:
+            return list(executor.map(lambda image: self._prepare_page(image, preprocess, force_preprocess), images))
     
-    def _build_structured_regions(
+    def _prepare_page(
         self,
+        image: Union[str, Path, np.ndarray, Image.Image],
+        preprocess: bool,
+        force_preprocess: bool = False
+    ) -> Tuple[Image.Image, List[str], List[List[int]], str]:
+        """
+        Prétraite une page et en extrait les mots et leurs boxes normalisées
+        0-1000, avec le prétraitement appliqué ("full", "geometry" ou "none")
+        """
+        # Conversion vers PIL
+        pil_image = self._convert_to_pil(image)
+        logger.info(f"Analyse structurée LayoutLM, taille: {pil_image.size}")
+        
+        # Prétraitement si demandé
+        preprocessing = "none"
+        if preprocess:
+            # Vue sans copie du buffer PIL (lecture seule: le préprocesseur
+            # produit de nouveaux tableaux)
+            pil_image.load()
+            np_image = np.asarray(pil_image)
+            
+            # Page déjà binarisée: débruitage et contraste n'apportent rien,
+            # seules la rotation et les bordures sont corrigées
+            if not force_preprocess and self._is_binarized(np_image):
+                processed_image = self.preprocessor.correct_rotation_and_crop(np_image)
+                preprocessing = "geometry"
+            else:
+                processed_image = self.preprocessor.process_image_array(np_image)
+                preprocessing = "full"
+            pil_image = Image.fromarray(processed_image)
+        
+        # Extraction OCR basique avec Tesseract pour obtenir les mots et positions
+        logger.debug("Extraction OCR basique pour les positions...")
+        ocr_data = pytesseract.image_to_data(
+            pil_image, 
+            output_type=pytesseract.Output.DICT,
+            lang='fra+eng'
+        )
+        
+        # Construction des tokens et bounding boxes (colonnes vectorisées)
+        stripped = [text.strip() for text in ocr_data['text']]
+        conf = np.asarray(ocr_data['conf'], dtype=np.float64).astype(np.int32)
+        mask = (conf > 30) & np.fromiter(map(bool, stripped), dtype=bool, count=len(stripped))  # Confiance minimum
+        words = [word for word, keep in zip(stripped, mask.tolist()) if keep]
+        
+        # Bounding boxes normalisées 0-1000 par rapport à la taille de l'image (format LayoutLM)
+        img_width, img_height = pil_image.size
+        x = np.asarray(ocr_data['left'], dtype=np.int64)[mask]
+        y = np.asarray(ocr_data['top'], dtype=np.int64)[mask]
+        w = np.asarray(ocr_data['width'], dtype=np.int64)[mask]
+        h = np.asarray(ocr_data['height'], dtype=np.int64)[mask]
+        boxes = np.stack([
+            1000 * x // img_width,
+            1000 * y // img_height,
+            1000 * (x + w) // img_width,
+            1000 * (y + h) // img_height
+        ], axis=1).tolist()
+        
+        return pil_image, words, boxes, preprocessing
+    
+    @staticmethod
+    def _is_binarized(np_image: np.ndarray) -> bool:
+        """Page déjà binarisée: presque aucun pixel entre l'encre et le papier (échantillon)"""
+        sample = np_image.reshape(-1)[::CLEAN_SCAN_SAMPLE_STEP]
+        midtones = np.count_nonzero((sample > 10) & (sample < 245))
+        return midtones <= CLEAN_SCAN_MAX_MIDTONES * sample.size
+    
+    def _encode(
+        self,
+        pil_images: List[Image.Image],
+        words_list: List[List[str]],
+        boxes_list: List[List[List[int]]]
+    ) -> Dict[str, torch.Tensor]:
+        """Tokenise les pages ensemble et place les tenseurs sur le device"""
+        # Séquences à la taille réelle de la plus longue page (l'attention est
+        # quadratique), arrondies au palier quand le forward est rejoué depuis
+        # un CUDA Graph ou compilé pour borner le nombre de captures
+        encoding = self.processor(
+            pil_images,
+            words_list,
+            boxes=boxes_list,
+            return_tensors="pt",
+            truncation=True,
+            max_length=self.config.max_sequence_length,
+            padding=True,
+            pad_to_multiple_of=SEQUENCE_BUCKET if self._pad_to_bucket() else None
+        )
+        
+        # Déplacement vers le device (pixel_values au type des poids). Sur CUDA,
+        # copies asynchrones depuis de la mémoire verrouillée: elles se
+        # recouvrent et le forward, sur le même stream, les attend
+        pinned = self.device.type == "cuda"
+        tensors = {}
+        for key, value in encoding.items():
+            if not isinstance(value, torch.Tensor):
+                continue
+            if pinned:
+                value = value.pin_memory()
+            dtype = self.dtype if value.is_floating_point() else value.dtype
+            tensors[key] = value.to(self.device, dtype=dtype, non_blocking=pinned)
+        return tensors
+    
+    def _predict(self, encoding: Dict[str, torch.Tensor]) -> Tuple[List[List[int]], List[float]]:
+        """
+        Classes prédites et confiance par page (moyenne, sur les tokens hors
+        padding, de la probabilité de la classe retenue)
+        """
+        logger.debug("Prédiction LayoutLMv3...")
+        with torch.no_grad():
+            logits = self._forward(encoding)
+            # softmax est monotone: argmax directement sur les logits
+            predicted_token_class_ids = logits.argmax(-1)
+            
+            mask = encoding['attention_mask']
+            token_confidences = logits.float().softmax(-1).amax(-1)
+            page_confidences = (token_confidences * mask).sum(dim=1) / mask.sum(dim=1)
+        
+        # Un seul transfert vers l'hôte pour tout le lot (pas de synchronisation par token)
+        lengths = mask.sum(dim=1).tolist()
+        token_classes = [row[:length] for row, length in zip(predicted_token_class_ids.tolist(), lengths)]
+        return token_classes, page_confidences.tolist()
+    
+    def _build_page_result(
+        self,
+        pil_image: Image.Image,
         words: List[str],
         boxes: List[List[int]],
-        predictions: torch.Tensor,
+        predicted_tokens: List[int],
+        confidence: float,
+        preprocessing: str,
+        processing_time: float
+    ) -> Tuple[OCRResult, List[StructuredRegion]]:
+        """Construit le résultat OCR global et les régions d'une page"""
+        full_text = " ".join(words)
+        detected_entities, structured_regions = self._parse_predictions(
+            words, boxes, predicted_tokens, pil_image.size
+        )
+        
+        ocr_result = OCRResult(
+            text=full_text,
+            confidence=confidence,
+            language="auto",
+            processing_time=processing_time,
+            word_count=len(words),
+            line_count=len(full_text.split('\n')),
+            bbox_data=[],
+            detected_entities=detected_entities,
+            quality_metrics={
+                "model_used": "LayoutLMv3",
+                "model_name": self.config.model_name,
+                "device": str(self.device),
+                "preprocessing_applied": preprocessing != "none",
+                "preprocessing": preprocessing,
+                "tokens_processed": len(words)
+            }
+        )
+        
+        return ocr_result, structured_regions
+    
+    def _create_error_result(self, error: Exception, processing_time: float) -> Tuple[OCRResult, List[StructuredRegion]]:
+        """Crée un résultat vide portant l'erreur rencontrée"""
+        empty_result = OCRResult(
+            text="",
+            confidence=0.0,
+            language="unknown",
+            processing_time=processing_time,
+            word_count=0,
+            line_count=0,
+            bbox_data=[],
+            detected_entities={},
+            quality_metrics={"error": str(error), "model_used": "LayoutLMv3_failed"}
+        )
+        
+        return empty_result, []
+    
+    def _parse_predictions(
+        self,
+        words: List[str],
+        boxes: List[List[int]],
+        predictions: List[int],
         image_size: Tuple[int, int]
-    ) -> List[StructuredRegion]:
-        """Construit les régions structurées du document"""
+    ) -> Tuple[Dict[str, List[str]], List[StructuredRegion]]:
+        """
+        Extrait en une passe les entités et les régions structurées à partir
+        des prédictions LayoutLM (séquences B-/I-, terminées par O ou un B-)
+        """
+        entities = {
+            'headers': [],
+            'titles': [],
+            'dates': [],
+            'amounts': [],
+            'addresses': [],
+            'companies': [],
+            'others': []
+        }
         regions = []
+        
+        # Dénormalisation 0-1000 -> pixels (x, y, largeur, hauteur) de toutes
+        # les boxes de la page en une passe, plutôt que région par région
         img_width, img_height = image_size
+        pixel_boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4) * np.array([img_width, img_height, img_width, img_height]) // 1000
+        pixel_boxes[:, 2:] -= pixel_boxes[:, :2]
+        token_bboxes = list(map(tuple, pixel_boxes.tolist()))
         
+        current_bucket = None
         current_region = None
         current_words = []
         current_boxes = []
         
-        for i, (word, box, pred_id) in enumerate(zip(words, boxes, predictions)):
-            pred_label = self.token_labels.get(int(pred_id), "O")
+        def flush():
+            # Termine l'entité en cours: texte dans sa liste, et région
+            if current_region and current_words:
+                entities[current_bucket].append(" ".join(current_words))
+                regions.append(self._create_region(current_region, current_words, current_boxes))
+        
+        for word, box, pred_id in zip(words, token_bboxes, predictions):
+            prefix = self._label_prefix[pred_id]
             
-            # Déterminer le type de région
-            if pred_label.startswith("B-"):
-                # Terminer la région précédente
-                if current_region and current_words:
-                    region = self._create_region(
-                        current_region, current_words, current_boxes, 
-                        img_width, img_height
-                    )
-                    regions.append(region)
-                
-                # Commencer une nouvelle région
-                entity_type = pred_label[2:].lower()
-                current_region = self._map_entity_to_region(entity_type)
+            if prefix == "B-":  # Début d'entité
+                flush()
+                current_bucket = self._label_bucket[pred_id]
+                current_region = self._label_region[pred_id]
                 current_words = [word]
                 current_boxes = [box]
                 
-            elif pred_label.startswith("I-") and current_region:
-                # Continuer la région actuelle
+            elif prefix == "I-" and current_region:  # Continuation d'entité
                 current_words.append(word)
                 current_boxes.append(box)
                 
-            else:
-                # Terminer la région actuelle si elle existe
-                if current_region and current_words:
-                    region = self._create_region(
-                        current_region, current_words, current_boxes,
-                        img_width, img_height
-                    )
-                    regions.append(region)
-                
+            else:  # O ou continuation sans début
+                flush()
+                current_bucket = None
                 current_region = None
                 current_words = []
                 current_boxes = []
         
-        # Terminer la dernière région
-        if current_region and current_words:
-            region = self._create_region(
-                current_region, current_words, current_boxes,
-                img_width, img_height
-            )
-            regions.append(region)
+        # Terminer la dernière entité
+        flush()
         
-        return regions
+        return entities, regions
     
     def _map_entity_to_region(self, entity_type: str) -> DocumentRegion:
         """Mappe un type d'entité vers un type de région"""
-        mapping = {
-            "header": DocumentRegion.HEADER,
-            "title": DocumentRegion.TITLE,
-            "date": DocumentRegion.PARAGRAPH,
-            "amount": DocumentRegion.PARAGRAPH,
-            "address": DocumentRegion.PARAGRAPH,
-            "company": DocumentRegion.PARAGRAPH,
-            "other": DocumentRegion.OTHER
-        }
-        return mapping.get(entity_type, DocumentRegion.OTHER)
+        return self._ENTITY_REGIONS.get(entity_type, DocumentRegion.OTHER)
     
     def _create_region(
         self,
         region_type: DocumentRegion,
         words: List[str],
-        boxes: List[List[int]],
-        img_width: int,
-        img_height: int
+        token_bboxes: List[Tuple[int, int, int, int]]
     ) -> StructuredRegion:
-        """Crée une région structurée"""
+        """Crée une région structurée à partir des boxes en pixels (x, y, largeur, hauteur)"""
         # Calculer la bounding box globale
-        min_x = min(box[0] for box in boxes) * img_width // 1000
-        min_y = min(box[1] for box in boxes) * img_height // 1000
-        max_x = max(box[2] for box in boxes) * img_width // 1000
-        max_y = max(box[3] for box in boxes) * img_height // 1000
+        min_x = min(box[0] for box in token_bboxes)
+        min_y = min(box[1] for box in token_bboxes)
+        max_x = max(box[0] + box[2] for box in token_bboxes)
+        max_y = max(box[1] + box[3] for box in token_bboxes)
         
         global_bbox = (min_x, min_y, max_x - min_x, max_y - min_y)
         
-        # Convertir les boxes individuelles
-        token_bboxes = []
-        for box in boxes:
-            x1 = box[0] * img_width // 1000
-            y1 = box[1] * img_height // 1000
-            x2 = box[2] * img_width // 1000
-            y2 = box[3] * img_height // 1000
-            token_bboxes.append((x1, y1, x2 - x1, y2 - y1))
-        
         # Calculer une confiance moyenne (simplifiée)
         confidence = 0.8  # LayoutLM est généralement fiable
         
@@ -561,6 +1045,9 @@ class LayoutLMEngine:
         return {
             "model_name": self.config.model_name,
             "device": str(self.device),
+            "backend": self.config.backend,
+            "precision": str(self.dtype).replace("torch.", ""),
+            "quantization": self.config.quantization if self.session is None and self._use_int8() else "none",
             "max_sequence_length": self.config.max_sequence_length,
             "confidence_threshold": self.config.confidence_threshold,
             "supported_labels": list(self.token_labels.values()),
@@ -568,6 +1055,29 @@ class LayoutLMEngine:
         }
 
 
+# Moteurs partagés par modèle: les poids ne sont chargés qu'une fois par processus
+_engines: Dict[str, LayoutLMEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_layoutlm_engine(model_name: str = "microsoft/layoutlmv3-base") -> LayoutLMEngine:
+    """
+    Retourne le moteur LayoutLM partagé pour ce modèle (chargé au premier appel)
+    
+    Args:
+        model_name: Modèle LayoutLM à utiliser
+        
+    Returns:
+        Moteur LayoutLM initialisé
+    """
+    with _engines_lock:
+        engine = _engines.get(model_name)
+        if engine is None:
+            engine = LayoutLMEngine(LayoutLMConfig(model_name=model_name))
+            _engines[model_name] = engine
+    return engine
+
+
 def extract_structured_text_simple(
     image: Union[str, Path, np.ndarray, Image.Image],
     model_name: str = "microsoft/layoutlmv3-base"
@@ -582,10 +1092,7 @@ def extract_structured_text_simple(
     Returns:
         Tuple (texte complet, régions avec métadonnées)
     """
-    config = LayoutLMConfig(model_name=model_name)
-    engine = LayoutLMEngine(config)
-    
-    ocr_result, regions = engine.extract_structured_text(image)
+    ocr_result, regions = get_layoutlm_engine(model_name).extract_structured_text(image)
     
     regions_dict = []
     for region in regions:
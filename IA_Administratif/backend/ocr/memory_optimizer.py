@@ -3,33 +3,113 @@ Optimiseur de mémoire pour les moteurs OCR
 Gestion intelligente de la mémoire GPU/CPU et cleanup automatique
 """
 
+import asyncio
+import ctypes
 import gc
 import logging
 import time
 import threading
 import psutil
 import os
-from typing import Dict, Any, Optional, Callable, List
-from dataclasses import dataclass
+import sys
+import tempfile
+from typing import Dict, Any, Optional, Callable, List, Tuple
+from dataclasses import dataclass, replace
 from functools import wraps
 import weakref
 
 logger = logging.getLogger(__name__)
 
-# Essayer d'importer les modules GPU disponibles
-GPU_AVAILABLE = False
+# NVML (optionnel): mémoire GPU lue auprès du driver, sans passer par
+# l'allocateur CUDA de PyTorch ni son verrou
 try:
-    import torch
-    GPU_AVAILABLE = torch.cuda.is_available() or (
-        hasattr(torch.backends, 'mps') and torch.backends.mps.is_available()
-    )
+    import pynvml
+    NVML_AVAILABLE = True
 except ImportError:
-    torch = None
+    NVML_AVAILABLE = False
 
+# torch importé (et GPU détecté) à la première demande de stats GPU seulement:
+# l'import du module ne charge ni torch ni le runtime CUDA
+_torch = None
+_gpu_available = None
+_gpu_kind = None  # "cuda", "mps" ou None, détecté une seule fois
+_torch_lock = threading.Lock()
 
-@dataclass
+# Objets du démarrage (modules, torch...) gelés une seule fois par processus
+_startup_frozen = False
+_startup_freeze_lock = threading.Lock()
+
+
+def _freeze_startup_objects():
+    """
+    Exclut des collectes complètes les objets vivants au premier optimiseur
+    créé (modules importés, démarrage). Une seule fois: un gel plus tardif
+    rendrait permanents les objets temporaires d'une requête et leurs cycles
+    """
+    global _startup_frozen
+    with _startup_freeze_lock:
+        if not _startup_frozen:
+            gc.freeze()
+            _startup_frozen = True
+
+
+# Part des seuils (processus, GPU) sous laquelle un nettoyage non agressif est sauté
+CLEANUP_SKIP_RATIO = 0.5
+
+# Intervalle maximal du monitoring (s), atteint en doublant l'intervalle sans pression
+MONITOR_MAX_INTERVAL = 300.0
+
+# Historique des allocations CUDA (mode trace de memory_optimized): un seul
+# enregistrement à la fois, l'historique étant global au processus
+CUDA_TRACE_MAX_ENTRIES = 100_000
+_cuda_trace_lock = threading.Lock()
+
+# Marge de réveil accordée au noyau pour le thread de monitoring (Linux, ns)
+MONITOR_TIMER_SLACK_NS = 1_000_000_000
+PR_SET_TIMERSLACK = 29
+
+# Conversions d'unités (octets)
+BYTES_PER_MB = 1 << 20
+BYTES_PER_GB = 1 << 30
+
+# Cache CUDA (réservé non alloué) en dessous duquel empty_cache n'est pas appelé (MB)
+CUDA_EMPTY_CACHE_MIN_SLACK_MB = 256
+
+
+def _get_torch():
+    """Retourne le module torch (None s'il n'est pas installé), importé au premier appel"""
+    global _torch, _gpu_available, _gpu_kind
+    if _gpu_available is None:
+        with _torch_lock:
+            if _gpu_available is None:
+                try:
+                    import torch
+                    _torch = torch
+                    if torch.cuda.is_available():
+                        _gpu_kind = "cuda"
+                    elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
+                        _gpu_kind = "mps"
+                except ImportError:
+                    pass
+                _gpu_available = _gpu_kind is not None
+    return _torch
+
+
+def _is_gpu_available() -> bool:
+    """Indique si un GPU (CUDA ou MPS) est utilisable"""
+    _get_torch()
+    return _gpu_available
+
+
+@dataclass(slots=True, frozen=True)
 class MemoryStats:
-    """Statistiques de mémoire système"""
+    """
+    Statistiques de mémoire système
+    
+    gpu_memory_used_gb est l'occupation de tout le GPU (total - libre selon
+    le driver, tous processus et cache de l'allocateur PyTorch compris), que
+    la mesure vienne de NVML ou de torch. Non mesurée sur Apple Silicon (0.0)
+    """
     total_ram_gb: float
     available_ram_gb: float
     used_ram_gb: float
@@ -48,71 +128,166 @@ class MemoryMonitor:
     
     def __init__(self):
         self.process = psutil.Process()
-        self._last_check = 0
-        self._cache_duration = 1.0  # Cache stats for 1 second
+        # Horloge monotone (insensible aux ajustements NTP), en nanosecondes
+        self._last_check_ns = 0
+        self._cache_duration_ns = 1_000_000_000  # Cache stats for 1 second
         self._cached_stats = None
+        # Stats GPU (appels au driver / verrou de l'allocateur): cache plus long
+        self._gpu_last_check_ns = 0
+        self._gpu_cache_duration_ns = 5_000_000_000
+        self._cached_gpu_stats = None  # (total_gb, used_gb, free_gb)
+        # Dernières stats complètes: (stats système, stats GPU, résultat combiné)
+        self._cached_full_stats = None
+        # Apple Silicon: mémoire unifiée, GPU estimé à 60% de la RAM (fixe)
+        mps_total_gb = psutil.virtual_memory().total * 0.6 / BYTES_PER_GB
+        self._mps_gpu_stats = (mps_total_gb, 0.0, mps_total_gb)  # Utilisation non disponible
+        # Handles NVML par index CUDA (NVML initialisé à la première lecture CUDA)
+        self._nvml_handles: Dict[int, Any] = {}
+        self._nvml_failed = not NVML_AVAILABLE
+        # GPU CUDA des stats en cache (le device courant peut changer)
+        self._cached_gpu_device = None
     
-    def get_memory_stats(self, force_refresh: bool = False) -> MemoryStats:
+    def get_memory_stats(self, force_refresh: bool = False, include_gpu: bool = True) -> MemoryStats:
         """
         Obtient les statistiques de mémoire actuelles
         
         Args:
             force_refresh: Forcer le rafraîchissement du cache
+            include_gpu: Renseigner la mémoire GPU (importe torch au premier appel)
             
         Returns:
             Statistiques de mémoire
         """
-        current_time = time.time()
+        now = time.monotonic_ns()
         
         # Utiliser le cache si disponible et récent
-        if (not force_refresh and 
-            self._cached_stats and 
-            current_time - self._last_check < self._cache_duration):
-            return self._cached_stats
-        
-        # Statistiques système
-        memory = psutil.virtual_memory()
-        process_memory = self.process.memory_info().rss / 1024 / 1024  # MB
-        
-        stats = MemoryStats(
-            total_ram_gb=memory.total / 1024**3,
-            available_ram_gb=memory.available / 1024**3,
-            used_ram_gb=memory.used / 1024**3,
-            ram_percent=memory.percent,
-            gpu_available=GPU_AVAILABLE,
-            process_memory_mb=process_memory
-        )
+        if (force_refresh or
+            not self._cached_stats or
+            now - self._last_check_ns >= self._cache_duration_ns):
+            # Statistiques système
+            memory = psutil.virtual_memory()
+            process_memory = self.process.memory_info().rss / BYTES_PER_MB
+            
+            # Mettre en cache
+            self._cached_stats = MemoryStats(
+                total_ram_gb=memory.total / BYTES_PER_GB,
+                available_ram_gb=memory.available / BYTES_PER_GB,
+                used_ram_gb=memory.used / BYTES_PER_GB,
+                ram_percent=memory.percent,
+                gpu_available=False,
+                process_memory_mb=process_memory
+            )
+            self._last_check_ns = now
+        
+        stats = self._cached_stats
+        
+        # Statistiques GPU si demandées et disponibles
+        if include_gpu and _is_gpu_available():
+            gpu_stats = self._get_gpu_stats(now, force_refresh)
+            full = self._cached_full_stats
+            if full is None or full[0] is not stats or full[1] is not gpu_stats:
+                # Combinaison recréée seulement quand l'un des deux caches change
+                gpu_total, gpu_used, gpu_free = gpu_stats or (0.0, 0.0, 0.0)
+                full = (stats, gpu_stats, replace(
+                    stats,
+                    gpu_available=True,
+                    gpu_memory_total_gb=gpu_total,
+                    gpu_memory_used_gb=gpu_used,
+                    gpu_memory_free_gb=gpu_free
+                ))
+                self._cached_full_stats = full
+            return full[2]
         
-        # Statistiques GPU si disponible
-        if GPU_AVAILABLE and torch:
-            try:
-                if torch.cuda.is_available():
-                    device = torch.cuda.current_device()
-                    gpu_memory = torch.cuda.get_device_properties(device).total_memory
-                    gpu_allocated = torch.cuda.memory_allocated(device)
-                    gpu_reserved = torch.cuda.memory_reserved(device)
-                    
-                    stats.gpu_memory_total_gb = gpu_memory / 1024**3
-                    stats.gpu_memory_used_gb = gpu_allocated / 1024**3
-                    stats.gpu_memory_free_gb = (gpu_memory - gpu_reserved) / 1024**3
+        return stats
+    
+    def _get_gpu_stats(self, now: int, force_refresh: bool) -> Optional[Tuple[float, float, float]]:
+        """
+        Mémoire GPU (totale, utilisée, libre) en GB, avec son propre cache
+        
+        Args:
+            now: Instant courant (time.monotonic_ns)
+            force_refresh: Ignorer le cache
+        """
+        torch = _get_torch()
+        device = torch.cuda.current_device() if _gpu_kind == "cuda" else None
+        
+        if (not force_refresh and
+            self._cached_gpu_stats and
+            device == self._cached_gpu_device and
+            now - self._gpu_last_check_ns < self._gpu_cache_duration_ns):
+            return self._cached_gpu_stats
+        
+        try:
+            if _gpu_kind == "cuda":
+                gpu_stats = self._get_nvml_stats(torch, device)
+                
+                if gpu_stats is None:
+                    # Mémoire libre selon le driver (cudaMemGetInfo): le cache de
+                    # l'allocateur PyTorch, réutilisable, n'est pas compté comme libre
+                    # mais les autres processus du GPU le sont
+                    gpu_free, gpu_memory = torch.cuda.mem_get_info(device)
                     
-                elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-                    # Pour Apple Silicon, utiliser les stats système
-                    # (PyTorch MPS ne fournit pas de stats détaillées)
-                    stats.gpu_memory_total_gb = stats.total_ram_gb * 0.6  # Estimation
-                    stats.gpu_memory_used_gb = 0.0  # Non disponible
-                    stats.gpu_memory_free_gb = stats.gpu_memory_total_gb
-            except Exception as e:
-                logger.debug(f"Erreur stats GPU: {e}")
+                    gpu_stats = (
+                        gpu_memory / BYTES_PER_GB,
+                        (gpu_memory - gpu_free) / BYTES_PER_GB,
+                        gpu_free / BYTES_PER_GB
+                    )
+                
+            elif _gpu_kind == "mps":
+                # Pour Apple Silicon, utiliser les stats système
+                # (PyTorch MPS ne fournit pas de stats détaillées)
+                gpu_stats = self._mps_gpu_stats
+            else:
+                return None
+        except Exception as e:
+            logger.debug(f"Erreur stats GPU: {e}")
+            return None
         
-        # Mettre en cache
-        self._cached_stats = stats
-        self._last_check = current_time
+        self._cached_gpu_stats = gpu_stats
+        self._cached_gpu_device = device
+        self._gpu_last_check_ns = now
+        return gpu_stats
+    
+    def _get_nvml_stats(self, torch, device: int) -> Optional[Tuple[float, float, float]]:
+        """
+        Mémoire (totale, utilisée, libre) en GB du GPU CUDA via NVML, None si
+        NVML est indisponible (repli sur torch)
         
-        return stats
+        Args:
+            torch: Module torch
+            device: Index CUDA du GPU
+        """
+        if self._nvml_failed:
+            return None
+        
+        try:
+            handle = self._nvml_handles.get(device)
+            if handle is None:
+                if not self._nvml_handles:
+                    pynvml.nvmlInit()
+                # Par UUID: les index NVML ignorent CUDA_VISIBLE_DEVICES
+                uuid = getattr(torch.cuda.get_device_properties(device), "uuid", None)
+                if uuid is not None:
+                    handle = pynvml.nvmlDeviceGetHandleByUUID(f"GPU-{uuid}")
+                else:
+                    handle = pynvml.nvmlDeviceGetHandleByIndex(device)
+                self._nvml_handles[device] = handle
+            
+            info = pynvml.nvmlDeviceGetMemoryInfo(handle)
+        except Exception as e:
+            logger.debug(f"NVML indisponible, stats GPU via torch: {e}")
+            self._nvml_failed = True
+            return None
+        
+        # Utilisé = total - libre, comme avec torch (info.used exclut la mémoire réservée par le driver)
+        return info.total / BYTES_PER_GB, (info.total - info.free) / BYTES_PER_GB, info.free / BYTES_PER_GB
     
     def log_memory_stats(self, prefix: str = ""):
         """Affiche les statistiques de mémoire dans les logs"""
+        # Ni stats ni formatage si le niveau INFO est filtré (production)
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
         stats = self.get_memory_stats()
         
         logger.info(f"{prefix}Mémoire système:")
@@ -151,11 +326,14 @@ class MemoryOptimizer:
         
         self.monitor = MemoryMonitor()
         
-        # Registre des modèles chargés (weak references)
-        self._loaded_models = weakref.WeakValueDictionary()
-        self._cleanup_callbacks = {}
+        # Registre des modèles chargés: id -> (référence faible, callback de nettoyage)
+        self._models: Dict[str, Tuple[weakref.ref, Optional[Callable]]] = {}
+        self._models_lock = threading.Lock()
+        
+        _freeze_startup_objects()
         
-        # Thread de monitoring
+        # Monitoring: tâche asyncio dans une boucle d'événements, thread sinon
+        self._monitoring_task = None
         self._monitoring_thread = None
         self._stop_monitoring = threading.Event()
         
@@ -178,21 +356,27 @@ class MemoryOptimizer:
             model_object: Objet modèle à monitorer
             cleanup_callback: Fonction de nettoyage personnalisée
         """
-        self._loaded_models[model_id] = model_object
-        if cleanup_callback:
-            self._cleanup_callbacks[model_id] = cleanup_callback
+        # L'entrée disparaît d'elle-même quand le modèle est collecté
+        model_ref = weakref.ref(model_object, lambda ref, mid=model_id: self._on_model_collected(mid, ref))
+        with self._models_lock:
+            self._models[model_id] = (model_ref, cleanup_callback)
         
         logger.debug(f"Modèle enregistré: {model_id}")
     
     def unregister_model(self, model_id: str):
         """Désenregistre un modèle"""
-        if model_id in self._loaded_models:
-            del self._loaded_models[model_id]
-        if model_id in self._cleanup_callbacks:
-            del self._cleanup_callbacks[model_id]
+        with self._models_lock:
+            self._models.pop(model_id, None)
         
         logger.debug(f"Modèle désenregistré: {model_id}")
     
+    def _on_model_collected(self, model_id: str, model_ref: weakref.ref):
+        """Retire un modèle collecté du registre (sauf s'il a été réenregistré depuis)"""
+        with self._models_lock:
+            entry = self._models.get(model_id)
+            if entry is not None and entry[0] is model_ref:
+                del self._models[model_id]
+    
     def check_memory_pressure(self) -> Dict[str, bool]:
         """
         Vérifie si la mémoire est sous pression
@@ -207,8 +391,7 @@ class MemoryOptimizer:
         process_pressure = stats.process_memory_mb > self.cleanup_threshold_mb
         
         if stats.gpu_available and stats.gpu_memory_total_gb > 0:
-            gpu_usage_percent = (stats.gpu_memory_used_gb / stats.gpu_memory_total_gb) * 100
-            gpu_pressure = gpu_usage_percent > self.max_gpu_percent
+            gpu_pressure = self._gpu_usage_percent(stats) > self.max_gpu_percent
         
         return {
             "ram_pressure": ram_pressure,
@@ -217,10 +400,18 @@ class MemoryOptimizer:
             "any_pressure": ram_pressure or gpu_pressure or process_pressure
         }
     
+    @staticmethod
+    def _gpu_usage_percent(stats: MemoryStats) -> float:
+        """Occupation réelle du GPU (driver), pas seulement les tenseurs de ce processus"""
+        return (stats.gpu_memory_total_gb - stats.gpu_memory_free_gb) / stats.gpu_memory_total_gb * 100
+    
     def cleanup_memory(self, aggressive: bool = False) -> Dict[str, Any]:
         """
         Effectue un nettoyage de mémoire
         
+        Un nettoyage standard est sauté (skipped) quand le processus et le GPU
+        sont bien en dessous de leurs seuils: il n'y aurait rien à libérer
+        
         Args:
             aggressive: Nettoyage agressif (décharge tous les modèles)
             
@@ -232,24 +423,30 @@ class MemoryOptimizer:
             "models_unloaded": 0,
             "torch_cleanup": False,
             "gc_collections": 0,
-            "memory_freed_mb": 0.0
+            "memory_freed_mb": 0.0,
+            "skipped": False
         }
         
+        if not aggressive and self._below_cleanup_thresholds(stats_before):
+            logger.debug("Nettoyage mémoire sauté: processus et GPU sous les seuils")
+            cleanup_stats["skipped"] = True
+            return cleanup_stats
+        
         logger.info(f"🧹 Nettoyage mémoire {'agressif' if aggressive else 'standard'}...")
         
         # 1. Nettoyage des modèles si agressif
         if aggressive:
             cleanup_stats["models_unloaded"] = self._unload_models()
         
-        # 2. Nettoyage PyTorch si disponible
-        if GPU_AVAILABLE and torch:
+        # 2. Nettoyage PyTorch si disponible (sans torch importé, aucun cache GPU à vider)
+        if "torch" in sys.modules and _is_gpu_available():
             cleanup_stats["torch_cleanup"] = self._cleanup_torch()
         
         # 3. Garbage collection Python
-        cleanup_stats["gc_collections"] = self._force_gc()
+        cleanup_stats["gc_collections"] = self._force_gc(full=aggressive)
         
-        # 4. Calculer la mémoire libérée
-        stats_after = self.monitor.get_memory_stats()
+        # 4. Calculer la mémoire libérée (mesure fraîche, pas les stats en cache d'avant)
+        stats_after = self.monitor.get_memory_stats(force_refresh=True, include_gpu=False)
         cleanup_stats["memory_freed_mb"] = (
             stats_before.process_memory_mb - stats_after.process_memory_mb
         )
@@ -258,12 +455,27 @@ class MemoryOptimizer:
         
         return cleanup_stats
     
+    def _below_cleanup_thresholds(self, stats: MemoryStats) -> bool:
+        """Processus et GPU sous CLEANUP_SKIP_RATIO de leurs seuils"""
+        if stats.process_memory_mb >= self.cleanup_threshold_mb * CLEANUP_SKIP_RATIO:
+            return False
+        if stats.gpu_available and stats.gpu_memory_total_gb > 0:
+            return self._gpu_usage_percent(stats) < self.max_gpu_percent * CLEANUP_SKIP_RATIO
+        return True
+    
     def _unload_models(self) -> int:
         """Décharge tous les modèles enregistrés"""
         unloaded = 0
         
+        # Vider le registre (instantané pris sous le verrou)
+        with self._models_lock:
+            models = list(self._models.items())
+            self._models.clear()
+        
         # Exécuter les callbacks de nettoyage
-        for model_id, callback in list(self._cleanup_callbacks.items()):
+        for model_id, (_, callback) in models:
+            if callback is None:
+                continue
             try:
                 callback()
                 unloaded += 1
@@ -271,21 +483,22 @@ class MemoryOptimizer:
             except Exception as e:
                 logger.warning(f"Erreur callback cleanup {model_id}: {e}")
         
-        # Vider les registres
-        self._loaded_models.clear()
-        self._cleanup_callbacks.clear()
-        
         return unloaded
     
     def _cleanup_torch(self) -> bool:
         """Nettoyage spécifique PyTorch"""
+        torch = _get_torch()
         try:
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-                torch.cuda.synchronize()
-                logger.debug("Cache CUDA vidé")
+            if _gpu_kind == "cuda":
+                # Pas de synchronize: il attendrait les inférences en cours.
+                # Seuls les blocs réservés mais inutilisés sont rendus, et
+                # seulement s'ils valent l'appel au driver
+                slack = torch.cuda.memory_reserved() - torch.cuda.memory_allocated()
+                if slack > CUDA_EMPTY_CACHE_MIN_SLACK_MB * BYTES_PER_MB:
+                    torch.cuda.empty_cache()
+                    logger.debug(f"Cache CUDA vidé ({slack / BYTES_PER_MB:.0f}MB)")
             
-            elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
+            elif _gpu_kind == "mps":
                 # Pour Apple Silicon
                 if hasattr(torch.mps, 'empty_cache'):
                     torch.mps.empty_cache()
@@ -296,18 +509,29 @@ class MemoryOptimizer:
             logger.warning(f"Erreur nettoyage PyTorch: {e}")
             return False
     
-    def _force_gc(self) -> int:
-        """Force le garbage collection Python"""
+    def _force_gc(self, full: bool = False) -> int:
+        """
+        Force le garbage collection Python
+        
+        Les objets temporaires de l'inférence sont dans les générations 0 et 1:
+        la génération 2, bien plus grande, n'est parcourue que si le processus
+        reste au-dessus du seuil (ou en nettoyage complet)
+        
+        Args:
+            full: Toujours collecter la génération 2
+        """
         collections = 0
         
-        # Plusieurs passes de GC
-        for i in range(3):
-            collected = gc.collect()
+        for generation in (0, 1, 2):
+            if generation == 2 and not full:
+                process_memory = self.monitor.get_memory_stats(force_refresh=True).process_memory_mb
+                if process_memory <= self.cleanup_threshold_mb:
+                    break
+            collected = gc.collect(generation)
             if collected > 0:
                 collections += 1
-                logger.debug(f"GC pass {i+1}: {collected} objets collectés")
-            else:
-                break
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"GC génération {generation}: {collected} objets collectés")
         
         return collections
     
@@ -315,40 +539,116 @@ class MemoryOptimizer:
         """
         Démarre le monitoring automatique de mémoire
         
+        Dans une boucle d'événements (serveur asyncio), le monitoring est une
+        tâche qui attend avec asyncio.sleep; hors boucle (script), un thread.
+        Sans pression, l'intervalle double jusqu'à MONITOR_MAX_INTERVAL et
+        revient à sa valeur initiale dès qu'une pression est détectée.
+        
         Args:
-            interval: Intervalle de vérification en secondes
+            interval: Intervalle de vérification initial en secondes
         """
+        if self._monitoring_task and not self._monitoring_task.done():
+            return
         if self._monitoring_thread and self._monitoring_thread.is_alive():
             return
         
-        def monitor_loop():
-            while not self._stop_monitoring.wait(interval):
-                try:
-                    pressure = self.check_memory_pressure()
-                    
-                    if pressure["any_pressure"]:
-                        logger.warning("⚠️ Pression mémoire détectée")
-                        self.monitor.log_memory_stats("Avant nettoyage - ")
-                        
-                        # Nettoyage automatique
-                        self.cleanup_memory(aggressive=pressure["process_pressure"])
-                        
-                        self.monitor.log_memory_stats("Après nettoyage - ")
-                        
-                except Exception as e:
-                    logger.error(f"Erreur monitoring mémoire: {e}")
-        
-        self._monitoring_thread = threading.Thread(
-            target=monitor_loop,
-            name="MemoryMonitor",
-            daemon=True
-        )
-        self._monitoring_thread.start()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if loop is not None:
+            self._monitoring_task = loop.create_task(self._monitor_async(interval))
+        else:
+            def monitor_loop():
+                self._relax_timer_slack()
+                current = interval
+                while not self._stop_monitoring.wait(current):
+                    pressure = self._process_over_threshold() and self._check_and_cleanup()
+                    current = self._next_interval(current, interval, pressure)
+            
+            self._stop_monitoring.clear()
+            self._monitoring_thread = threading.Thread(
+                target=monitor_loop,
+                name="MemoryMonitor",
+                daemon=True
+            )
+            self._monitoring_thread.start()
         
         logger.info(f"🔍 Monitoring mémoire démarré (intervalle: {interval}s)")
     
+    async def _monitor_async(self, interval: float):
+        """Boucle de monitoring asyncio: vérification et nettoyage hors de la boucle d'événements"""
+        loop = asyncio.get_running_loop()
+        current = interval
+        while True:
+            await asyncio.sleep(current)
+            pressure = self._process_over_threshold() and await loop.run_in_executor(None, self._check_and_cleanup)
+            current = self._next_interval(current, interval, pressure)
+    
+    @staticmethod
+    def _relax_timer_slack():
+        """
+        Autorise le noyau à décaler le réveil du thread courant (prctl
+        PR_SET_TIMERSLACK, Linux): il est regroupé avec d'autres timers.
+        Réservé au thread de monitoring, sans contrainte de latence
+        """
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            if libc.prctl(PR_SET_TIMERSLACK, ctypes.c_ulong(MONITOR_TIMER_SLACK_NS), 0, 0, 0) != 0:
+                logger.debug(f"PR_SET_TIMERSLACK refusé (errno {ctypes.get_errno()})")
+        except Exception as e:
+            logger.debug(f"PR_SET_TIMERSLACK indisponible: {e}")
+    
+    @staticmethod
+    def _next_interval(current: float, interval: float, pressure: bool) -> float:
+        """Intervalle suivant: initial sous pression, doublé (plafonné) sinon"""
+        if pressure:
+            return interval
+        return min(current * 2, max(interval, MONITOR_MAX_INTERVAL))
+    
+    def _process_over_threshold(self) -> bool:
+        """
+        Pré-vérification peu coûteuse (RSS du processus seul): sous le seuil,
+        il y a peu à libérer et les stats complètes (RAM, GPU) sont évitées
+        """
+        try:
+            return self.monitor.process.memory_info().rss >= self.cleanup_threshold_mb * BYTES_PER_MB
+        except Exception as e:
+            logger.error(f"Erreur monitoring mémoire: {e}")
+            return False
+    
+    def _check_and_cleanup(self) -> bool:
+        """Vérifie la pression mémoire et nettoie si nécessaire (retourne True sous pression)"""
+        try:
+            pressure = self.check_memory_pressure()
+            
+            if pressure["any_pressure"]:
+                logger.warning("⚠️ Pression mémoire détectée")
+                self.monitor.log_memory_stats("Avant nettoyage - ")
+                
+                # Nettoyage automatique
+                self.cleanup_memory(aggressive=pressure["process_pressure"])
+                
+                self.monitor.log_memory_stats("Après nettoyage - ")
+            
+            return pressure["any_pressure"]
+            
+        except Exception as e:
+            logger.error(f"Erreur monitoring mémoire: {e}")
+            return False
+    
     def stop_monitoring(self):
         """Arrête le monitoring automatique"""
+        if self._monitoring_task:
+            task = self._monitoring_task
+            self._monitoring_task = None
+            if not task.done() and not task.get_loop().is_closed():
+                # Annulation depuis n'importe quel thread (destructeur compris)
+                task.get_loop().call_soon_threadsafe(task.cancel)
+            logger.info("🛑 Monitoring mémoire arrêté")
         if self._monitoring_thread:
             self._stop_monitoring.set()
             self._monitoring_thread.join(timeout=5.0)
@@ -374,7 +674,7 @@ class MemoryOptimizer:
                 "gpu_memory_free_gb": stats.gpu_memory_free_gb
             },
             "pressure_indicators": pressure,
-            "loaded_models": list(self._loaded_models.keys()),
+            "loaded_models": list(self._models),
             "optimizer_config": {
                 "max_ram_percent": self.max_ram_percent,
                 "max_gpu_percent": self.max_gpu_percent,
@@ -394,7 +694,8 @@ class MemoryOptimizer:
 def memory_optimized(
     cleanup_after: bool = True,
     aggressive_cleanup: bool = False,
-    model_id: Optional[str] = None
+    model_id: Optional[str] = None,
+    trace_on_spike_mb: float = 0.0
 ):
     """
     Décorateur pour optimiser automatiquement la mémoire des fonctions
@@ -403,6 +704,9 @@ def memory_optimized(
         cleanup_after: Nettoyer après l'exécution
         aggressive_cleanup: Nettoyage agressif
         model_id: ID du modèle à enregistrer/désenregistrer
+        trace_on_spike_mb: Si > 0 (CUDA), enregistre l'historique des allocations
+            pendant l'appel et en écrit un snapshot (pickle, pile Python de chaque
+            allocation) si la mémoire CUDA allouée augmente de plus de ce seuil
     """
     def decorator(func):
         @wraps(func)
@@ -414,11 +718,16 @@ def memory_optimized(
                     optimizer = arg._memory_optimizer
                     break
             
+            # Sinon l'optimiseur global (un nouvel optimiseur par appel lancerait
+            # à chaque fois son propre monitoring)
             if not optimizer:
-                optimizer = MemoryOptimizer()
+                optimizer = get_memory_optimizer()
             
-            # Statistiques avant
-            stats_before = optimizer.monitor.get_memory_stats()
+            # Statistiques avant (mémoire processus seulement)
+            stats_before = optimizer.monitor.get_memory_stats(include_gpu=False)
+            
+            # Mode trace: aucun coût s'il n'est pas demandé
+            cuda_before = _start_cuda_trace() if trace_on_spike_mb > 0 else None
             
             try:
                 # Exécuter la fonction
@@ -438,25 +747,70 @@ def memory_optimized(
                         optimizer.cleanup_memory(aggressive=aggressive_cleanup)
                 
                 # Statistiques après
-                stats_after = optimizer.monitor.get_memory_stats()
+                stats_after = optimizer.monitor.get_memory_stats(include_gpu=False)
                 memory_diff = stats_after.process_memory_mb - stats_before.process_memory_mb
                 
                 if memory_diff > 50:  # Log si augmentation significative
                     logger.info(f"💾 {func.__name__}: {memory_diff:+.1f}MB mémoire")
+                
+                if cuda_before is not None:
+                    _stop_cuda_trace(func.__name__, cuda_before, trace_on_spike_mb)
         
         return wrapper
     return decorator
 
 
+def _start_cuda_trace() -> Optional[int]:
+    """
+    Démarre l'enregistrement de l'historique des allocations CUDA
+    
+    Returns:
+        Mémoire CUDA allouée au départ (octets), None si la trace n'est pas
+        possible (pas de CUDA, ou trace déjà en cours dans un autre appel)
+    """
+    torch = _get_torch()
+    if _gpu_kind != "cuda" or not _cuda_trace_lock.acquire(blocking=False):
+        return None
+    
+    try:
+        torch.cuda.memory._record_memory_history(max_entries=CUDA_TRACE_MAX_ENTRIES)
+        return torch.cuda.memory_allocated()
+    except Exception as e:
+        logger.warning(f"Trace mémoire CUDA impossible: {e}")
+        _cuda_trace_lock.release()
+        return None
+
+
+def _stop_cuda_trace(func_name: str, allocated_before: int, spike_mb: float):
+    """Écrit un snapshot si l'allocation CUDA a dépassé le seuil, puis arrête l'enregistrement"""
+    torch = _get_torch()
+    try:
+        cuda_diff = (torch.cuda.memory_allocated() - allocated_before) / BYTES_PER_MB
+        if cuda_diff > spike_mb:
+            snapshot_path = os.path.join(tempfile.gettempdir(), f"mem_{func_name}_{int(time.time())}.pickle")
+            torch.cuda.memory._dump_snapshot(snapshot_path)
+            logger.warning(f"💾 {func_name}: {cuda_diff:+.1f}MB CUDA, snapshot des allocations: {snapshot_path}")
+    except Exception as e:
+        logger.warning(f"Snapshot mémoire CUDA impossible: {e}")
+    finally:
+        try:
+            torch.cuda.memory._record_memory_history(enabled=None)
+        finally:
+            _cuda_trace_lock.release()
+
+
 # Instance globale d'optimiseur
 _global_optimizer = None
+_global_optimizer_lock = threading.Lock()
 
 
 def get_memory_optimizer() -> MemoryOptimizer:
-    """Retourne l'instance globale d'optimiseur de mémoire"""
+    """Retourne l'instance globale d'optimiseur de mémoire (créée une seule fois)"""
     global _global_optimizer
     if _global_optimizer is None:
-        _global_optimizer = MemoryOptimizer()
+        with _global_optimizer_lock:
+            if _global_optimizer is None:
+                _global_optimizer = MemoryOptimizer()
     return _global_optimizer
 
 
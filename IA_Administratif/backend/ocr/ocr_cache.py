@@ -19,6 +19,13 @@ import redis
 from PIL import Image
 import numpy as np
 
+# Hash non cryptographique rapide (optionnel) pour les clés de cache
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 # Import des modules OCR
 from .tesseract_ocr import OCRResult
 
@@ -50,45 +57,51 @@ class ImageHasher:
     Générateur de hash pour images
     """
     
+    @staticmethod
+    def _digest(*chunks) -> str:
+        """Hash rapide de buffers (xxh3 si disponible, sinon blake2b)"""
+        hasher = xxhash.xxh3_128() if XXHASH_AVAILABLE else hashlib.blake2b(digest_size=16)
+        for chunk in chunks:
+            hasher.update(chunk)
+        return hasher.hexdigest()
+    
     @staticmethod
     def hash_image(image: Union[str, Path, np.ndarray, Image.Image]) -> str:
         """
         Génère un hash unique pour une image
         
+        Le hash porte sur le contenu brut (octets du fichier ou buffer de
+        pixels) sans décodage ni ré-encodage de l'image.
+        
         Args:
             image: Image à hasher
             
         Returns:
-            Hash MD5 de l'image
+            Hash du contenu de l'image
         """
         try:
-            # Gestion spéciale pour les fichiers
+            # Fichiers (images et PDFs): hash des octets du fichier
             if isinstance(image, (str, Path)):
-                image_path = str(image)
-                
-                # Pour les PDFs, utiliser hash du fichier directement
-                if image_path.lower().endswith('.pdf'):
-                    with open(image_path, 'rb') as f:
-                        file_content = f.read()
-                        return hashlib.sha256(file_content).hexdigest()
-                
-                # Pour les autres fichiers, utiliser PIL
-                pil_image = Image.open(image)
+                with open(image, 'rb') as f:
+                    return ImageHasher._digest(f.read())
+            
+            palette = b""
+            if isinstance(image, Image.Image):
+                mode = image.mode
+                image.load()
+                # Images à palette (P, PA): les pixels sont des index, la palette fait partie du contenu
+                colors = image.getpalette()
+                if colors:
+                    palette = bytes(colors)
+                image = np.asarray(image)
             elif isinstance(image, np.ndarray):
-                pil_image = Image.fromarray(image)
-            elif isinstance(image, Image.Image):
-                pil_image = image
+                mode = "array"
             else:
                 raise ValueError(f"Type d'image non supporté: {type(image)}")
             
-            # Convertir en bytes
-            import io
-            img_bytes = io.BytesIO()
-            pil_image.save(img_bytes, format='PNG')
-            img_bytes = img_bytes.getvalue()
-            
-            # Générer hash SHA256 (plus sûr que MD5)
-            return hashlib.sha256(img_bytes).hexdigest()
+            # Buffer de pixels, préfixé par la géométrie pour éviter les collisions
+            header = f"{mode}|{image.dtype.str}|{image.shape}|{len(palette)}".encode()
+            return ImageHasher._digest(header, palette, np.ascontiguousarray(image).data)
             
         except Exception as e:
             logger.error(f"Erreur génération hash image: {e}")
@@ -691,7 +704,8 @@ class OCRCacheManager:
         self,
         image: Union[str, Path, np.ndarray, Image.Image],
         ocr_engine: str,
-        params: Optional[Dict[str, Any]] = None
+        params: Optional[Dict[str, Any]] = None,
+        cache_key: Optional[str] = None
     ) -> Optional[OCRResult]:
         """
         Récupère un résultat OCR depuis le cache
@@ -700,11 +714,12 @@ class OCRCacheManager:
             image: Image source
             ocr_engine: Nom du moteur OCR
             params: Paramètres OCR
+            cache_key: Clé déjà calculée (évite de re-hasher l'image)
             
         Returns:
             Résultat OCR si trouvé dans le cache
         """
-        cache_key = ImageHasher.generate_cache_key(image, ocr_engine, params)
+        cache_key = cache_key or ImageHasher.generate_cache_key(image, ocr_engine, params)
         
         entry = self.cache.get(cache_key)
         return entry.result if entry else None
@@ -715,7 +730,8 @@ class OCRCacheManager:
         ocr_engine: str,
         result: OCRResult,
         params: Optional[Dict[str, Any]] = None,
-        ttl: Optional[float] = None
+        ttl: Optional[float] = None,
+        cache_key: Optional[str] = None
     ):
         """
         Met en cache un résultat OCR
@@ -726,8 +742,9 @@ class OCRCacheManager:
             result: Résultat OCR à cacher
             params: Paramètres OCR
             ttl: Durée de vie personnalisée
+            cache_key: Clé déjà calculée (évite de re-hasher l'image)
         """
-        cache_key = ImageHasher.generate_cache_key(image, ocr_engine, params)
+        cache_key = cache_key or ImageHasher.generate_cache_key(image, ocr_engine, params)
         
         metadata = {
             'ocr_engine': ocr_engine,
@@ -151,7 +151,9 @@ class TableDetector:
         elif isinstance(image_input, np.ndarray):
             return image_input.copy()
         elif isinstance(image_input, Image.Image):
-            return cv2.cvtColor(np.array(image_input), cv2.COLOR_RGB2BGR)
+            # Vue sans copie du buffer PIL, cvtColor écrit le seul nouveau tableau
+            image_input.load()
+            return cv2.cvtColor(np.asarray(image_input), cv2.COLOR_RGB2BGR)
         else:
             raise ValueError(f"Format image non supporté: {type(image_input)}")
     
@@ -16,10 +16,33 @@ from dataclasses import dataclass
 from datetime import datetime
 import tempfile
 import os
+import queue
+import weakref
+
+# API Tesseract persistante (optionnelle): évite un sous-processus et le
+# rechargement des traineddata à chaque appel
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 
+def _release_tesserocr_apis(api_pools: Dict[Tuple[str, int], "queue.SimpleQueue"]):
+    """Libère les APIs tesserocr d'un moteur (finaliseur, appelé aussi à la sortie)"""
+    for pool in api_pools.values():
+        while True:
+            try:
+                pool.get_nowait().End()
+            except queue.Empty:
+                break
+            except Exception:
+                pass
+    api_pools.clear()
+
+
 @dataclass
 class OCRResult:
     """Résultat de l'OCR avec métadonnées"""
@@ -32,6 +55,22 @@ class OCRResult:
     bbox_data: List[Dict[str, Any]]
     detected_entities: Dict[str, List[str]]
     quality_metrics: Dict[str, float]
+    
+    def to_soa(self) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Bboxes mot à mot en structure de tableaux (calculs vectorisés)
+        
+        Returns:
+            (xywh float32 [N, 4], confiances float32 [N], textes)
+        """
+        count = len(self.bbox_data)
+        xywh = np.array(
+            [(b['left'], b['top'], b['width'], b['height']) for b in self.bbox_data],
+            dtype=np.float32
+        ).reshape(count, 4)
+        conf = np.fromiter((b['confidence'] for b in self.bbox_data), dtype=np.float32, count=count)
+        texts = [b['text'] for b in self.bbox_data]
+        return xywh, conf, texts
 
 
 @dataclass
@@ -51,7 +90,8 @@ class TesseractOCR:
     def __init__(self, 
                  default_lang: str = 'fra+eng',
                  psm: int = 3,
-                 oem: int = 3):
+                 oem: int = 3,
+                 api_mode: str = "auto"):
         """
         Initialise le wrapper Tesseract
         
@@ -59,6 +99,8 @@ class TesseractOCR:
             default_lang: Langue par défaut (fra+eng pour français + anglais)
             psm: Page Segmentation Mode (3 = automatic page segmentation)
             oem: OCR Engine Mode (3 = Default, based on what is available)
+            api_mode: "tesserocr" (API persistante), "pytesseract" (sous-processus)
+                ou "auto" (tesserocr si installé)
         """
         self.default_lang = default_lang
         self.psm = psm
@@ -67,6 +109,19 @@ class TesseractOCR:
         # Configuration Tesseract
         self.config = f'--oem {oem} --psm {psm}'
         
+        # Backend: API tesserocr persistante si disponible, sinon pytesseract
+        if api_mode not in ("auto", "tesserocr", "pytesseract"):
+            raise ValueError(f"Mode API Tesseract non supporté: {api_mode}")
+        if api_mode == "tesserocr" and not TESSEROCR_AVAILABLE:
+            logger.warning("tesserocr non installé, utilisation de pytesseract")
+        self.use_tesserocr = TESSEROCR_AVAILABLE and api_mode != "pytesseract"
+        
+        # Pools d'APIs par (langue, psm): une API n'est pas thread-safe, chaque
+        # appel en emprunte une et la rend; les traineddata restent chargées
+        self._api_pools: Dict[Tuple[str, int], queue.SimpleQueue] = {}
+        if self.use_tesserocr:
+            weakref.finalize(self, _release_tesserocr_apis, self._api_pools)
+        
         # Langues supportées
         self.supported_languages = {
             'fra': 'Français',
@@ -139,11 +194,12 @@ class TesseractOCR:
             # Configuration pour cette extraction
             config = f'{self.config} -l {lang}'
             
-            # Extraction du texte
-            text = pytesseract.image_to_string(pil_image, config=config).strip()
-            
-            # Extraction des données détaillées
-            data = pytesseract.image_to_data(pil_image, config=config, output_type=pytesseract.Output.DICT)
+            # Extraction du texte et des données détaillées
+            if self.use_tesserocr:
+                text, data = self._recognize_with_tesserocr(pil_image, lang)
+            else:
+                text = pytesseract.image_to_string(pil_image, config=config).strip()
+                data = pytesseract.image_to_data(pil_image, config=config, output_type=pytesseract.Output.DICT)
             
             # Calcul de la confiance moyenne
             confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
@@ -401,15 +457,72 @@ class TesseractOCR:
         
         return image
     
+    def _acquire_api(self, lang: str, psm: int) -> "tesserocr.PyTessBaseAPI":
+        """Emprunte une API tesserocr initialisée pour (langue, psm), créée au besoin"""
+        pool = self._api_pools.setdefault((lang, psm), queue.SimpleQueue())
+        try:
+            return pool.get_nowait()
+        except queue.Empty:
+            logger.debug(f"Création d'une API tesserocr (lang={lang}, psm={psm})")
+            return tesserocr.PyTessBaseAPI(lang=lang, psm=psm, oem=self.oem)
+    
+    def _release_api(self, lang: str, psm: int, api: "tesserocr.PyTessBaseAPI"):
+        """Rend une API au pool pour les appels suivants"""
+        api.Clear()
+        self._api_pools[(lang, psm)].put(api)
+    
+    def _recognize_with_tesserocr(self, image: Image.Image, lang: str) -> Tuple[str, Dict[str, List]]:
+        """
+        Reconnaissance via une API tesserocr persistante
+        
+        Returns:
+            Texte et données par mot au format de pytesseract.image_to_data
+            (clés level/text/conf/left/top/width/height)
+        """
+        api = self._acquire_api(lang, self.psm)
+        try:
+            api.SetImage(image)
+            api.Recognize()
+            text = api.GetUTF8Text().strip()
+            
+            word_level = tesserocr.RIL.WORD
+            data = {'level': [], 'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+            for word in tesserocr.iterate_level(api.GetIterator(), word_level):
+                word_text = word.GetUTF8Text(word_level)
+                box = word.BoundingBox(word_level)
+                if word_text is None or box is None:
+                    continue
+                left, top, right, bottom = box
+                data['level'].append(5)  # Niveau "mot" de image_to_data
+                data['text'].append(word_text)
+                data['conf'].append(word.Confidence(word_level))
+                data['left'].append(left)
+                data['top'].append(top)
+                data['width'].append(right - left)
+                data['height'].append(bottom - top)
+            
+            return text, data
+        finally:
+            self._release_api(lang, self.psm, api)
+    
     def _detect_language(self, image: Image.Image) -> str:
         """Détecte automatiquement la langue du document"""
         try:
-            # Utiliser OSD (Orientation and Script Detection)
-            osd_data = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
-            
-            # Tenter une détection rapide sur un échantillon
-            sample_text = pytesseract.image_to_string(image, config='--psm 6 -l eng+fra', 
-                                                    timeout=10)[:200]
+            if self.use_tesserocr:
+                # Échantillon via une API persistante (psm 6, eng+fra)
+                api = self._acquire_api('eng+fra', 6)
+                try:
+                    api.SetImage(image)
+                    sample_text = api.GetUTF8Text()[:200]
+                finally:
+                    self._release_api('eng+fra', 6, api)
+            else:
+                # Utiliser OSD (Orientation and Script Detection)
+                osd_data = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
+                
+                # Tenter une détection rapide sur un échantillon
+                sample_text = pytesseract.image_to_string(image, config='--psm 6 -l eng+fra', 
+                                                        timeout=10)[:200]
             
             # Heuristiques simples pour détecter le français
             french_indicators = ['le ', 'la ', 'les ', 'de ', 'du ', 'des ', 'et ', 'à ', 'pour ', 'avec ']
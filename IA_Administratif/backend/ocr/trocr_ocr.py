@@ -9,6 +9,8 @@ from pathlib import Path
 from typing import Union, Optional, List, Dict, Any, Tuple
 import tempfile
 import os
+import platform
+import shutil
 from dataclasses import dataclass
 
 import torch
@@ -18,6 +20,14 @@ from transformers import TrOCRProcessor, VisionEncoderDecoderModel
 from huggingface_hub import hf_hub_download
 import cv2
 
+# Backend ONNX Runtime (optionnel): export du modèle et quantification int8 du décodeur
+try:
+    from optimum.onnxruntime import ORTModelForVision2Seq, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    OPTIMUM_AVAILABLE = True
+except ImportError:
+    OPTIMUM_AVAILABLE = False
+
 # Import des modules locaux
 from .tesseract_ocr import TesseractOCR, OCRResult
 from .image_preprocessor import ImagePreprocessor
@@ -36,9 +46,19 @@ class TrOCRConfig:
     use_gpu: bool = True
     fallback_to_tesseract: bool = True
     confidence_threshold: float = 0.8
+    backend: str = "pytorch"  # pytorch | onnx | onnx-int8
+    quantization: str = "none"  # none | int8 (décodeur, backend onnx uniquement)
     
     def __post_init__(self):
         """Configure le cache_dir selon l'environnement"""
+        if self.backend == "onnx-int8":
+            self.backend = "onnx"
+            self.quantization = "int8"
+        if self.backend not in ("pytorch", "onnx"):
+            raise ValueError(f"Backend TrOCR inconnu: {self.backend} (disponibles: pytorch, onnx, onnx-int8)")
+        if self.quantization not in ("none", "int8"):
+            raise ValueError(f"Quantification TrOCR inconnue: {self.quantization} (disponibles: none, int8)")
+        
         if self.cache_dir is None:
             # Détecter l'environnement natif macOS
             if os.path.exists("/Users/stephaneansel/Documents/LEXO_v1/IA_Administratif/ml_models/transformers"):
@@ -126,12 +146,7 @@ class TrOCREngine:
                     model_path,
                     local_files_only=True
                 )
-                
-                logger.info(f"Chargement du modèle TrOCR depuis le modèle local: {model_path}")
-                self.model = VisionEncoderDecoderModel.from_pretrained(
-                    model_path,
-                    local_files_only=True
-                )
+                model_source, model_cache_dir = model_path, None
             else:
                 # Fallback avec le nom du modèle et cache
                 logger.info("Chargement du processeur TrOCR depuis le cache HuggingFace...")
@@ -140,17 +155,21 @@ class TrOCREngine:
                     cache_dir=cache_dir,
                     local_files_only=True
                 )
-                
-                logger.info("Chargement du modèle TrOCR depuis le cache HuggingFace...")
+                model_source, model_cache_dir = self.config.model_name, cache_dir
+            
+            if self.config.backend == "onnx":
+                self.model = self._load_onnx_model(model_source, model_cache_dir, cache_dir)
+            else:
+                logger.info(f"Chargement du modèle TrOCR depuis: {model_source}")
                 self.model = VisionEncoderDecoderModel.from_pretrained(
-                    self.config.model_name,
-                    cache_dir=cache_dir,
+                    model_source,
+                    cache_dir=model_cache_dir,
                     local_files_only=True
                 )
-            
-            # Déplacer le modèle sur le device approprié
-            self.model.to(self.device)
-            self.model.eval()  # Mode évaluation
+                
+                # Déplacer le modèle sur le device approprié
+                self.model.to(self.device)
+                self.model.eval()  # Mode évaluation
             
             # Initialiser le fallback Tesseract si nécessaire
             if self.config.fallback_to_tesseract:
@@ -163,6 +182,80 @@ class TrOCREngine:
             logger.error(f"Erreur lors de l'initialisation de TrOCR: {str(e)}")
             raise RuntimeError(f"Impossible d'initialiser TrOCR: {str(e)}")
     
+    def _load_onnx_model(self, model_source: str, model_cache_dir: Optional[str], cache_dir: Optional[str]):
+        """
+        Charge TrOCR avec ONNX Runtime
+        
+        Le modèle est exporté une seule fois en ONNX sous cache_dir/onnx, puis
+        le décodeur est quantifié en int8 (quantification dynamique) si demandé.
+        
+        Args:
+            model_source: Répertoire local ou nom HuggingFace du modèle
+            model_cache_dir: Cache HuggingFace à utiliser pour le modèle source
+            cache_dir: Répertoire de cache des exports ONNX
+        """
+        if not OPTIMUM_AVAILABLE:
+            raise RuntimeError("Backend ONNX demandé mais optimum[onnxruntime] n'est pas installé")
+        
+        # ONNX Runtime: CUDA ou CPU (pas de provider MPS)
+        if self.device.type == "cuda":
+            provider = "CUDAExecutionProvider"
+        else:
+            if self.device.type != "cpu":
+                logger.info(f"Backend ONNX: device {self.device} non supporté, utilisation du CPU")
+                self.device = torch.device("cpu")
+            provider = "CPUExecutionProvider"
+        
+        export_root = Path(cache_dir or tempfile.gettempdir()) / "onnx" / Path(model_source).name
+        fp32_dir = export_root / "fp32"
+        if not (fp32_dir / "encoder_model.onnx").exists():
+            logger.info(f"Export ONNX de TrOCR vers {fp32_dir} (une seule fois)...")
+            exported = ORTModelForVision2Seq.from_pretrained(
+                model_source,
+                export=True,
+                cache_dir=model_cache_dir,
+                local_files_only=True
+            )
+            exported.save_pretrained(fp32_dir)
+            del exported
+        
+        if self.config.quantization != "int8":
+            logger.info(f"Chargement du modèle TrOCR ONNX ({provider})")
+            return ORTModelForVision2Seq.from_pretrained(fp32_dir, provider=provider)
+        
+        int8_dir = export_root / "int8"
+        decoder_files = sorted(
+            name for name in os.listdir(fp32_dir)
+            if name.startswith("decoder") and name.endswith(".onnx")
+        )
+        if not all((int8_dir / name.replace(".onnx", "_quantized.onnx")).exists() for name in decoder_files):
+            logger.info(f"Quantification int8 du décodeur TrOCR vers {int8_dir} (une seule fois)...")
+            int8_dir.mkdir(parents=True, exist_ok=True)
+            if platform.machine() in ("arm64", "aarch64"):
+                qconfig = AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+            else:
+                qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            for name in decoder_files:
+                quantizer = ORTQuantizer.from_pretrained(fp32_dir, file_name=name)
+                quantizer.quantize(save_dir=int8_dir, quantization_config=qconfig)
+            # Encodeur et configurations copiés tels quels
+            for name in os.listdir(fp32_dir):
+                if not name.startswith("decoder"):
+                    src = fp32_dir / name
+                    if src.is_file():
+                        shutil.copy2(src, int8_dir / name)
+        
+        file_names = {}
+        if (int8_dir / "decoder_model_quantized.onnx").exists():
+            file_names["decoder_file_name"] = "decoder_model_quantized.onnx"
+        elif (int8_dir / "decoder_model_merged_quantized.onnx").exists():
+            file_names["decoder_file_name"] = "decoder_model_merged_quantized.onnx"
+        if (int8_dir / "decoder_with_past_model_quantized.onnx").exists():
+            file_names["decoder_with_past_file_name"] = "decoder_with_past_model_quantized.onnx"
+        
+        logger.info(f"Chargement du modèle TrOCR ONNX int8 ({provider})")
+        return ORTModelForVision2Seq.from_pretrained(int8_dir, provider=provider, **file_names)
+    
     def _convert_to_pil(self, image_input: Union[str, Path, np.ndarray, Image.Image]) -> Image.Image:
         """
         Convertit différents formats d'image vers PIL Image, y compris PDF
@@ -216,6 +309,95 @@ class TrOCREngine:
         else:
             raise ValueError(f"Format d'image non supporté: {type(image_input)}")
     
+    def _prepare_image(
+        self,
+        image: Union[str, Path, np.ndarray, Image.Image],
+        preprocess: bool
+    ) -> Tuple[Image.Image, Tuple[int, int]]:
+        """
+        Convertit l'image en PIL et applique le prétraitement si demandé
+        
+        Returns:
+            Image PIL prête pour le processeur TrOCR et taille d'origine
+        """
+        pil_image = self._convert_to_pil(image)
+        original_size = pil_image.size
+        
+        if preprocess:
+            logger.debug("Application du prétraitement...")
+            # Convertir PIL vers numpy pour le préprocesseur (vue sans copie,
+            # lecture seule: le préprocesseur produit de nouveaux tableaux)
+            pil_image.load()
+            np_image = np.asarray(pil_image)
+            if len(np_image.shape) == 3:
+                np_image = cv2.cvtColor(np_image, cv2.COLOR_RGB2BGR)
+            
+            processed_image = self.preprocessor.process_image_array(np_image)
+            
+            # Reconvertir vers PIL
+            if len(processed_image.shape) == 3:
+                processed_image = cv2.cvtColor(processed_image, cv2.COLOR_BGR2RGB)
+            pil_image = Image.fromarray(processed_image)
+        
+        return pil_image, original_size
+    
+    def _generate_texts(self, pixel_values) -> List[str]:
+        """Génère et décode le texte pour un tenseur d'images (une ou plusieurs)"""
+        with torch.no_grad():
+            generated_ids = self.model.generate(
+                pixel_values,
+                max_length=self.config.max_length,
+                num_beams=4,
+                early_stopping=True
+            )
+        
+        return self.processor.batch_decode(
+            generated_ids, 
+            skip_special_tokens=True
+        )
+    
+    def _build_result(
+        self,
+        generated_text: str,
+        pil_image: Image.Image,
+        original_size: Tuple[int, int],
+        preprocess: bool,
+        processing_time: float
+    ) -> OCRResult:
+        """Construit l'OCRResult (métriques, confiance, entités) pour un texte généré"""
+        word_count = len(generated_text.split())
+        line_count = len(generated_text.split('\n'))
+        
+        # Score de confiance approximatif (TrOCR ne fournit pas de score direct)
+        confidence = self._estimate_confidence(generated_text, pil_image)
+        
+        # Extraction d'entités basique
+        entities = self._extract_entities(generated_text)
+        
+        # Métriques de qualité
+        quality_metrics = {
+            "model_used": "TrOCR",
+            "model_name": self.config.model_name,
+            "backend": self.config.backend,
+            "quantization": self.config.quantization,
+            "device": str(self.device),
+            "preprocessing_applied": preprocess,
+            "original_size": original_size,
+            "estimated_confidence": confidence
+        }
+        
+        return OCRResult(
+            text=generated_text,
+            confidence=confidence,
+            language="auto",  # TrOCR détecte automatiquement
+            processing_time=processing_time,
+            word_count=word_count,
+            line_count=line_count,
+            bbox_data=[],  # TrOCR ne fournit pas de bounding boxes
+            detected_entities=entities,
+            quality_metrics=quality_metrics
+        )
+    
     def extract_text(
         self, 
         image: Union[str, Path, np.ndarray, Image.Image],
@@ -237,85 +419,31 @@ class TrOCREngine:
         use_fallback = use_fallback if use_fallback is not None else self.config.fallback_to_tesseract
         
         try:
-            # Conversion vers PIL
-            pil_image = self._convert_to_pil(image)
-            original_size = pil_image.size
+            # Conversion vers PIL et prétraitement éventuel
+            pil_image, original_size = self._prepare_image(image, preprocess)
             
             logger.info(f"Extraction TrOCR démarrée, taille: {original_size}")
             
-            # Prétraitement si demandé
-            if preprocess:
-                logger.debug("Application du prétraitement...")
-                # Convertir PIL vers numpy pour le préprocesseur
-                np_image = np.array(pil_image)
-                if len(np_image.shape) == 3:
-                    np_image = cv2.cvtColor(np_image, cv2.COLOR_RGB2BGR)
-                
-                processed_image = self.preprocessor.process_image_array(np_image)
-                
-                # Reconvertir vers PIL
-                if len(processed_image.shape) == 3:
-                    processed_image = cv2.cvtColor(processed_image, cv2.COLOR_BGR2RGB)
-                pil_image = Image.fromarray(processed_image)
-            
             # Préparation de l'image pour TrOCR
             pixel_values = self.processor(
                 images=pil_image, 
                 return_tensors="pt"
             ).pixel_values.to(self.device)
             
-            # Génération du texte
+            # Génération et décodage du texte
             logger.debug("Génération du texte avec TrOCR...")
-            with torch.no_grad():
-                generated_ids = self.model.generate(
-                    pixel_values,
-                    max_length=self.config.max_length,
-                    num_beams=4,
-                    early_stopping=True
-                )
-            
-            # Décodage du texte
-            generated_text = self.processor.batch_decode(
-                generated_ids, 
-                skip_special_tokens=True
-            )[0]
-            
-            # Calcul des métriques
-            processing_time = time.time() - start_time
-            word_count = len(generated_text.split())
-            line_count = len(generated_text.split('\n'))
-            
-            # Score de confiance approximatif (TrOCR ne fournit pas de score direct)
-            confidence = self._estimate_confidence(generated_text, pil_image)
-            
-            # Extraction d'entités basique
-            entities = self._extract_entities(generated_text)
+            generated_text = self._generate_texts(pixel_values)[0]
             
-            # Métriques de qualité
-            quality_metrics = {
-                "model_used": "TrOCR",
-                "model_name": self.config.model_name,
-                "device": str(self.device),
-                "preprocessing_applied": preprocess,
-                "original_size": original_size,
-                "estimated_confidence": confidence
-            }
+            result = self._build_result(
+                generated_text, pil_image, original_size, preprocess,
+                time.time() - start_time
+            )
             
-            logger.info(f"TrOCR terminé: {word_count} mots, "
-                       f"confiance estimée: {confidence:.3f}, "
-                       f"temps: {processing_time:.2f}s")
+            logger.info(f"TrOCR terminé: {result.word_count} mots, "
+                       f"confiance estimée: {result.confidence:.3f}, "
+                       f"temps: {result.processing_time:.2f}s")
             
-            return OCRResult(
-                text=generated_text,
-                confidence=confidence,
-                language="auto",  # TrOCR détecte automatiquement
-                processing_time=processing_time,
-                word_count=word_count,
-                line_count=line_count,
-                bbox_data=[],  # TrOCR ne fournit pas de bounding boxes
-                detected_entities=entities,
-                quality_metrics=quality_metrics
-            )
+            return result
             
         except Exception as e:
             logger.error(f"Erreur TrOCR: {str(e)}")
@@ -366,33 +494,74 @@ class TrOCREngine:
         
         results = []
         
-        # Traiter par batch pour optimiser l'utilisation GPU
+        # Traiter par batch: une seule passe generate() par groupe d'images
         for i in range(0, len(images), self.config.batch_size):
             batch = images[i:i + self.config.batch_size]
-            
-            for image in batch:
-                try:
-                    result = self.extract_text(image, preprocess=preprocess)
-                    results.append(result)
-                    
-                except Exception as e:
-                    logger.error(f"Erreur sur image {i}: {e}")
-                    # Ajouter un résultat d'erreur
-                    results.append(OCRResult(
-                        text="",
-                        confidence=0.0,
-                        language="unknown",
-                        processing_time=0.0,
-                        word_count=0,
-                        line_count=0,
-                        bbox_data=[],
-                        detected_entities={},
-                        quality_metrics={"error": str(e)}
-                    ))
+            results.extend(self._extract_batch_chunk(batch, preprocess))
         
         logger.info(f"Batch terminé: {len(results)} résultats")
         return results
     
+    def _extract_batch_chunk(
+        self,
+        batch: List[Union[str, Path, np.ndarray, Image.Image]],
+        preprocess: bool
+    ) -> List[OCRResult]:
+        """
+        Traite un groupe d'images en un seul appel au modèle
+        
+        Les pixel_values sont empilés pour un unique generate(); en cas d'échec
+        du batch, les images sont retraitées une par une.
+        """
+        start_time = time.time()
+        chunk_results: List[Optional[OCRResult]] = [None] * len(batch)
+        prepared = []
+        
+        for index, image in enumerate(batch):
+            try:
+                pil_image, original_size = self._prepare_image(image, preprocess)
+                prepared.append((index, pil_image, original_size))
+            except Exception as e:
+                logger.error(f"Erreur préparation image {index} du batch: {e}")
+                chunk_results[index] = OCRResult(
+                    text="",
+                    confidence=0.0,
+                    language="unknown",
+                    processing_time=0.0,
+                    word_count=0,
+                    line_count=0,
+                    bbox_data=[],
+                    detected_entities={},
+                    quality_metrics={"error": str(e)}
+                )
+        
+        if not prepared:
+            return chunk_results
+        
+        try:
+            pixel_values = self.processor(
+                images=[pil_image for _, pil_image, _ in prepared],
+                return_tensors="pt"
+            ).pixel_values.to(self.device)
+            
+            generated_texts = self._generate_texts(pixel_values)
+            
+            # Temps de traitement réparti sur les images du batch
+            per_image_time = (time.time() - start_time) / len(prepared)
+            for (index, pil_image, original_size), generated_text in zip(prepared, generated_texts):
+                chunk_results[index] = self._build_result(
+                    generated_text, pil_image, original_size, preprocess, per_image_time
+                )
+            
+            logger.debug(f"Batch TrOCR de {len(prepared)} images en {time.time() - start_time:.2f}s")
+            
+        except Exception as e:
+            logger.warning(f"Erreur batch TrOCR: {e}, traitement image par image")
+            for index, _, _ in prepared:
+                chunk_results[index] = self.extract_text(batch[index], preprocess=preprocess)
+        
+        return chunk_results
+    
     def _estimate_confidence(self, text: str, image: Image.Image) -> float:
         """
         Estime un score de confiance pour TrOCR
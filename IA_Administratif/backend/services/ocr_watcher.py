@@ -22,7 +22,7 @@ from core.database import AsyncSessionLocal
 from models.document import Document
 from models.user import User
 from ocr.hybrid_ocr import HybridOCREngine, OCRStrategy
-from ocr.entity_extractor import EntityExtractor 
+from ocr.entity_extractor import get_entity_extractor
 from services.document_classifier import get_document_classifier
 from sqlalchemy import select
 
@@ -38,7 +38,7 @@ class OCRFileHandler(FileSystemEventHandler):
     def __init__(self):
         super().__init__()
         self.ocr_engine = HybridOCREngine()
-        self.entity_extractor = EntityExtractor()
+        self.entity_extractor = get_entity_extractor()
         self.processing_files: Set[str] = set()
         self.file_timestamps: Dict[str, float] = {}
         